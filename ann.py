@@ -0,0 +1,120 @@
+"""대규모 카탈로그용 근사 최근접 이웃(ANN) 후보 생성
+
+필드별 TF-IDF 행렬을 TruncatedSVD로 저차원에 투영해 이어 붙이고(열이 적은 필드는 그대로),
+그 공간을 MiniBatchKMeans로 n_lists개 클러스터(IVF 역색인)로 나눈다.
+질의는 필드 가중치를 곱한 투영 벡터와 내적이 큰 nprobe개 클러스터의 도서만 후보로 모아
+원래 CSR 행렬로 정확히 재채점한다 — 점수는 정확하고, 근사는 후보 선택에만 있다.
+numpy/scikit-learn만 사용하며 CPU에서 로컬로 동작한다.
+"""
+import threading
+
+import numpy as np
+
+from features import FIELDS
+from scoring import top_k
+
+
+class AnnIndex:
+    """components: 필드별 투영 행렬 (d_f × V_f, 열이 적은 필드는 None=항등),
+    centroids: (n_lists × Σd_f), lists/list_indptr: 클러스터별 도서 인덱스 (CSR 형태)"""
+    __slots__ = ("components", "z_offsets", "centroids", "lists", "list_indptr")
+
+    def __init__(self, components, z_offsets, centroids, lists, list_indptr):
+        self.components = components
+        self.z_offsets = z_offsets
+        self.centroids = centroids
+        self.lists = lists
+        self.list_indptr = list_indptr
+
+    @property
+    def n_lists(self):
+        return len(self.list_indptr) - 1
+
+    @property
+    def nbytes(self):
+        n = sum(c.nbytes for c in self.components if c is not None)
+        return n + self.centroids.nbytes + self.lists.nbytes + self.list_indptr.nbytes
+
+    def project(self, engine, q_indices, q_data, weights):
+        """쌓은 열 공간의 희소 질의 → 필드 가중치를 곱한 저차원 벡터"""
+        z = np.zeros(self.z_offsets[-1], dtype=np.float32)
+        for fi, comp in enumerate(self.components):
+            lo, hi = engine.offsets[fi], engine.offsets[fi + 1]
+            sel = (q_indices >= lo) & (q_indices < hi)
+            cols, vals = q_indices[sel] - lo, q_data[sel] * weights[fi]
+            z0 = self.z_offsets[fi]
+            if comp is None:
+                z[z0 + cols] = vals
+            else:
+                z[z0:self.z_offsets[fi + 1]] = comp[:, cols] @ vals
+        return z
+
+    def candidates(self, z, nprobe):
+        """질의 벡터와 내적이 큰 nprobe개 클러스터의 도서 인덱스"""
+        probe = top_k(self.centroids @ z, nprobe)
+        return np.concatenate([self.lists[self.list_indptr[c]:self.list_indptr[c + 1]] for c in probe])
+
+
+def build_ann_index(engine, n_components=32, n_lists=None, seed=0):
+    """engine의 네 필드 행렬로 IVF 색인을 만든다 (n_lists 기본값 ≈ 4·√N)"""
+    from sklearn.cluster import MiniBatchKMeans       # 근사 모드를 고를 때만 필요 (기동 시간)
+    from sklearn.decomposition import TruncatedSVD
+    n = engine.n_items
+    parts, components = [], []
+    for f in FIELDS:
+        X = engine.models.matrices[f]
+        if X.shape[1] <= n_components:
+            parts.append(X.toarray().astype(np.float32))
+            components.append(None)
+        else:
+            svd = TruncatedSVD(n_components=n_components, random_state=seed)
+            parts.append(svd.fit_transform(X).astype(np.float32))
+            components.append(svd.components_.astype(np.float32))
+    z_offsets = np.cumsum([0] + [P.shape[1] for P in parts])
+    Z = np.hstack(parts)
+    n_lists = int(n_lists or max(1, min(n, round(4 * np.sqrt(n)))))
+    km = MiniBatchKMeans(n_clusters=n_lists, random_state=seed, n_init=3,
+                         batch_size=max(1024, 4 * n_lists)).fit(Z)
+    labels = km.labels_
+    lists = np.argsort(labels, kind="stable").astype(np.int32)
+    list_indptr = np.searchsorted(labels[lists], np.arange(n_lists + 1))
+    return AnnIndex(components, z_offsets, km.cluster_centers_.astype(np.float32), lists, list_indptr)
+
+
+_build_lock = threading.Lock()
+
+
+def ensure_ann_index(engine, on_built=None, **kwargs):
+    """engine.ann이 없으면 (세션 간 한 번만) 빌드해 붙인다 — 새로 붙였으면 on_built() (예: ModelCache.resize)"""
+    with _build_lock:
+        if engine.ann is None:
+            engine.ann = build_ann_index(engine, **kwargs)
+            if on_built is not None:
+                on_built()
+        return engine.ann
+
+
+def _rerank(engine, ann, q_indices, q_data, weights, recency, w_recency, k, nprobe, exclude):
+    w = np.asarray(weights, dtype=np.float64)
+    rows = ann.candidates(ann.project(engine, q_indices, q_data, w), nprobe)
+    rows = rows[~np.isin(rows, exclude)]
+    if len(rows) < k:
+        # 후보 부족 → 전수 계산
+        content = engine.stacked @ engine.query_vector(q_indices, q_data, w)
+        final = (1 - w_recency) * content + w_recency * recency
+        top = top_k(final, k, exclude=exclude)
+        return top, content[top], final[top]
+    content = engine.stacked[rows] @ engine.query_vector(q_indices, q_data, w)
+    final = (1 - w_recency) * content + w_recency * recency[rows]
+    top = top_k(final, k)
+    return rows[top], content[top], final[top]
+
+
+def ann_similar_items(engine, idx, weights, recency, w_recency, k, nprobe=8):
+    """기준 도서 idx와 비슷한 상위 k권 (ANN 후보 + 정확 재채점) → (인덱스, 콘텐츠 점수, 최종 점수)"""
+    return _rerank(engine, engine.ann, *engine.item_query(idx), weights, recency, w_recency, k, nprobe, [idx])
+
+
+def ann_query_items(engine, query, weights, recency, w_recency, k, nprobe=8):
+    """키워드 질의 상위 k권 (ANN 후보 + 정확 재채점) → (인덱스, 콘텐츠 점수, 최종 점수)"""
+    return _rerank(engine, engine.ann, *engine.transform_query(query), weights, recency, w_recency, k, nprobe, [])
@@ -0,0 +1,124 @@
+"""여러 기준 도서/키워드 질의를 한꺼번에 채점하는 일괄 추천 (야간 메일 다이제스트 등 오프라인용)
+
+질의들을 쌓은 열 공간의 희소 행렬 Q (b×D, 필드 가중치를 곱한 값)로 만들고, 질의 행 블록마다
+블록에 등장한 단어의 역색인 행(Xᵀ[cols], 단어 → 도서 목록)만 모아 희소 곱 한 번으로 블록 전체의
+점수(b×N)를 구한 뒤 행별 top-k를 부분 선택한다. 쌓은 행렬 X 전체를 훑는 질의당 행렬-벡터 곱과 달리
+블록 질의에 실제로 나온 단어의 도서 목록만 읽는다.
+결과는 질의마다 similar_items(exact, 이웃 그래프 없음) / score_query + top_k를 부른 것과 같다
+(부동소수 합산 순서가 달라 점수가 1ulp 정도 다를 수 있음).
+"""
+import numpy as np
+
+from features import FIELDS
+from scoring import top_k
+
+BLOCK_CELLS = 2**21         # 블록당 밀집 점수 행렬 크기(질의 수 × N) 상한 — 16MB(float64) / 8MB(float32)
+
+
+def top_k_rows(S, k, exclude=None, mask=None):
+    """행별 top_k — S (b×N) 밀집 점수 → (인덱스, 점수) (b×min(k, N)), 내림차순
+
+    exclude: 행별로 뺄 열 (길이 b, -1=없음), mask: False인 열 제외 (길이 N).
+    동점은 인덱스가 작은 쪽이 앞서고, 조건을 만족하는 열이 k개보다 적은 행은 -1 / -inf로 채운다.
+    S는 제자리에서 바뀔 수 있다.
+
+    행 전체를 부분 정렬하는 대신, 행을 m개 구간으로 나눈 구간 최댓값 중 k번째 값 lb(≤ 실제 k번째 값)를
+    먼저 구하고 S ≥ lb인 열(실제 k번째 값과 같은 동점 포함)만 top_k로 고른다 — 결과는 행마다 top_k와 같다.
+    """
+    b, n = S.shape
+    if mask is not None:
+        S[:, ~np.asarray(mask, dtype=bool)] = -np.inf
+    if exclude is not None:
+        exclude = np.asarray(exclude, dtype=np.int64)
+        r = np.flatnonzero(exclude >= 0)
+        S[r, exclude[r]] = -np.inf
+    kk = min(int(k), n)
+    indices = np.full((b, max(kk, 0)), -1, dtype=np.int64)
+    vals = np.full((b, max(kk, 0)), -np.inf, dtype=S.dtype)
+    if kk <= 0 or b == 0:
+        return indices, vals
+    m = min(n, max(4 * kk, 64))
+    width = n // m
+    maxima = S[:, :m * width].reshape(b, m, width).max(axis=2)
+    lb = -np.partition(-maxima, kk - 1, axis=1)[:, kk - 1:kk]
+    rr, cc = np.nonzero(S >= lb)
+    bounds = np.searchsorted(rr, np.arange(b + 1))
+    for i in range(b):
+        cand = cc[bounds[i]:bounds[i + 1]]
+        sc = S[i, cand]
+        top = top_k(sc, kk, mask=sc > -np.inf)
+        indices[i, :len(top)] = cand[top]
+        vals[i, :len(top)] = sc[top]
+    return indices, vals
+
+
+def weighted_queries(engine, Q, weights):
+    """쌓은 열 공간의 질의 행렬 Q (b×D CSR) → 필드 가중치를 곱한 사본"""
+    import scipy.sparse as sp
+    w = np.asarray(weights, dtype=np.float64)
+    Q = sp.csr_matrix(Q, dtype=engine.dtype, copy=True)
+    Q.data *= w[np.searchsorted(engine.offsets, Q.indices, side="right") - 1]
+    return Q
+
+
+def item_queries(engine, seeds):
+    """기준 도서 seeds의 쌓은 행 → 질의 행렬 (b×D)"""
+    return engine.stacked[np.asarray(seeds, dtype=np.int64)]
+
+
+def text_queries(engine, queries):
+    """질의 문자열 목록 → 질의 행렬 (b×D) — 필드별 transform을 목록 전체에 한 번씩"""
+    import scipy.sparse as sp
+    return sp.hstack([engine.models.vectorizers[f].transform(list(queries)) for f in FIELDS], format="csr")
+
+
+def batch_scores(engine, Q, weights, block_cells=BLOCK_CELLS):
+    """질의 행 블록마다 (b×N 밀집 콘텐츠 점수, 블록 시작 행)을 차례로 (점수는 N×b 결과의 전치 뷰)"""
+    Q = weighted_queries(engine, Q, weights)
+    n = engine.n_items
+    block = max(1, block_cells // max(n, 1))
+    postings = engine.stacked.tocsr().T.tocsr()    # D×N 역색인 (호출마다 한 번, O(nnz); float16 보관이면 float32로)
+    for b0 in range(0, Q.shape[0], block):
+        Qb = Q[b0:b0 + block]
+        cols = np.unique(Qb.indices)
+        # (N×|cols| CSC) · (|cols|×b 밀집) → N×b: 블록 질의에 나온 단어의 도서 목록만 누적
+        S = postings[cols].T @ Qb[:, cols].toarray().T
+        yield S.T, b0
+
+
+def _recommend(engine, Q, weights, recency, w_recency, k, exclude, mask, block_cells):
+    b = Q.shape[0]
+    kk = min(int(k), engine.n_items)
+    indices = np.full((b, kk), -1, dtype=np.int64)
+    content = np.full((b, kk), np.nan)
+    final = np.full((b, kk), np.nan)
+    for S, b0 in batch_scores(engine, Q, weights, block_cells):
+        F = np.multiply(S, 1 - w_recency if recency is not None else 1.0, order="C")   # 행 우선 사본
+        if recency is not None:
+            F += w_recency * recency
+        ex = exclude[b0:b0 + S.shape[0]] if exclude is not None else None
+        top, vals = top_k_rows(F, kk, exclude=ex, mask=mask)
+        ok = top >= 0
+        rows = slice(b0, b0 + S.shape[0])
+        indices[rows] = top
+        content[rows] = np.where(ok, np.take_along_axis(S, np.maximum(top, 0), axis=1), np.nan)
+        final[rows] = np.where(ok, vals, np.nan)
+    return indices, content, final
+
+
+def recommend_items(engine, seeds, weights, recency=None, w_recency=0.0, k=10, mask=None,
+                    block_cells=BLOCK_CELLS):
+    """기준 도서 seeds마다 비슷한 상위 k권 → (인덱스, 콘텐츠 점수, 최종 점수) 각 (len(seeds)×k)
+
+    기준 도서 자신은 제외하며, mask(False인 도서 제외)를 만족하는 도서가 k권보다 적은 행은 -1 / nan으로 채운다.
+    """
+    seeds = np.asarray(seeds, dtype=np.int64)
+    return _recommend(engine, item_queries(engine, seeds), weights, recency, w_recency, k,
+                      seeds, mask, block_cells)
+
+
+def recommend_queries(engine, queries, weights, recency=None, w_recency=0.0, k=10, mask=None,
+                      block_cells=BLOCK_CELLS):
+    """키워드 질의 문자열마다 상위 k권 → (인덱스, 콘텐츠 점수, 최종 점수) 각 (len(queries)×k)"""
+    return _recommend(engine, text_queries(engine, queries), weights, recency, w_recency, k,
+                      None, mask, block_cells)
@@ -0,0 +1,709 @@
+"""추천 핵심 경로 마이크로 벤치마크 (Streamlit 없이 실행)
+
+    python bench.py scoring --n 100000
+    python bench.py topk --n 1000000 --k 15
+    python bench.py neighbors --n 20000 --graph-k 50
+    python bench.py ann --n 200000 --nprobe 1 4 16 64
+    python bench.py ingest books.jsonl.gz --workers 1 2 4 8
+    python bench.py title --n 1000000 --query 도서관 역사 디지털도서관 a 관
+    python bench.py hashing --n 200000 --features 16 18 20
+    python bench.py incremental --n 200000 --add 1000
+    python bench.py batch --n 100000 --queries 10000 --block-cells 20 21 22
+    python bench.py startup --target-ms 600
+    python bench.py dtype --n 100000 --k 10
+    python bench.py stream
+    python bench.py prune --n 100000 --pruning '{"desc": {"min_df": 2, "max_df": 0.5}}'
+    python bench.py suite --sizes 1k 100k 1m --out bench_results.json --compare last_results.json
+"""
+import argparse, ast, datetime, itertools, json, os, platform, resource, subprocess, sys, tempfile, time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from features import (FIELDS, MATRIX_DTYPES, count_catalog, field_dtype, fit_field_models, parse_pruning,
+                      refit_from_counts, sparse_nbytes)
+from scoring import ScoringEngine, top_k
+from neighbors import build_neighbor_graph, similar_items
+from ann import ann_similar_items, build_ann_index
+from titleindex import build_title_index
+from catalogindex import CatalogIndex
+from batch import recommend_items, recommend_queries
+from catalog import CatalogBuilder, catalog_from_books, iter_books, stream_catalog_file
+from recommender import Recommender
+import synth
+
+SUBJECTS = ["도서관학", "저작권", "디지털도서관", "역사", "문학", "철학", "경제", "정보검색",
+            "메타데이터", "아동", "과학", "교육", "사회학", "예술", "종교", "법학"]
+PUBLISHERS = ["한국도서관협회", "민음사", "창비", "문학동네", "한울", "박영사", "사계절", "김영사"]
+SURNAMES = list("김이박최정강조윤장임한오서신권황안송류홍")
+
+
+def synthetic_field_texts(n, seed=0, vocab_size=20000):
+    """주제/설명/저자/출판사 텍스트 네 목록 (설명 어휘는 Zipf 분포)"""
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"어휘{i}" for i in range(vocab_size)])
+    zipf = 1.0 / np.arange(1, vocab_size + 1)
+    zipf /= zipf.sum()
+    lens = rng.integers(0, 60, size=n)
+    words = vocab[rng.choice(vocab_size, size=int(lens.sum()), p=zipf)]
+    bounds = np.concatenate([[0], np.cumsum(lens)])
+    desc = [" ".join(words[bounds[i]:bounds[i + 1]]) for i in range(n)]
+    subj, auth, pub = [], [], []
+    for _ in range(n):
+        subj.append(" ".join(rng.choice(SUBJECTS, size=rng.integers(0, 4), replace=False)))
+        auth.append(f"{rng.choice(SURNAMES)}저자{rng.integers(0, n // 20 + 1)} 지음")
+        pub.append(str(rng.choice(PUBLISHERS)))
+    return subj, desc, auth, pub
+
+
+def timeit(fn, repeat):
+    t = time.perf_counter()
+    for i in range(repeat):
+        out = fn(i)
+    return (time.perf_counter() - t) / repeat, out
+
+
+def bench_scoring(args):
+    texts = synthetic_field_texts(args.n, args.seed)
+    models = fit_field_models(*texts)
+    engine = ScoringEngine(models)
+    mats = [models.matrices[f] for f in FIELDS]
+    weights = (0.45, 0.30, 0.15, 0.10)
+    seeds = np.random.default_rng(args.seed).integers(0, args.n, size=args.repeat)
+
+    def four_cosines(i):
+        idx = seeds[i]
+        return sum(w * cosine_similarity(X[idx], X).flatten() for w, X in zip(weights, mats))
+
+    def fused(i):
+        return engine.score_item(seeds[i], weights)
+
+    t_old, a = timeit(four_cosines, args.repeat)
+    t_new, b = timeit(fused, args.repeat)
+    print(f"catalog={args.n:,}  stacked nnz={engine.stacked.nnz:,}  cols={engine.stacked.shape[1]:,}")
+    print(f"4× cosine_similarity + blend : {t_old * 1e3:8.2f} ms/query")
+    print(f"fused stacked CSR matvec     : {t_new * 1e3:8.2f} ms/query  ({t_old / t_new:.1f}× faster)")
+    print(f"max |Δscore| = {np.abs(a - b).max():.2e}")
+
+
+def bench_topk(args):
+    rng = np.random.default_rng(args.seed)
+    scores = rng.random(args.n)
+    seeds = rng.integers(0, args.n, size=args.repeat)
+
+    def full_sort(i):
+        order = scores.argsort()[::-1]
+        return np.array([j for j in order if j != seeds[i]][:args.k])
+
+    def partial(i):
+        return top_k(scores, args.k, exclude=[seeds[i]])
+
+    t_old, a = timeit(full_sort, args.repeat)
+    t_new, b = timeit(partial, args.repeat)
+    print(f"catalog={args.n:,}  k={args.k}")
+    print(f"argsort + list filter : {t_old * 1e3:8.2f} ms/query")
+    print(f"top_k (partial select): {t_new * 1e3:8.2f} ms/query  ({t_old / t_new:.1f}× faster)")
+    print(f"same result: {np.array_equal(a, b)}")
+
+
+def bench_neighbors(args):
+    engine = ScoringEngine(fit_field_models(*synthetic_field_texts(args.n, args.seed)))
+    rng = np.random.default_rng(args.seed)
+    recency = rng.choice([0.0, 0.2, 0.4, 0.6, 0.8, 1.0], size=args.n)
+    weights, w_recency = (0.45, 0.30, 0.15, 0.10), 0.30
+    seeds = rng.integers(0, args.n, size=args.repeat)
+
+    t = time.perf_counter()
+    graph = build_neighbor_graph(engine, k=args.graph_k, tie_break=recency)
+    t_build = time.perf_counter() - t
+
+    def run(i):
+        return similar_items(engine, seeds[i], weights, recency, w_recency, args.k, exact=False)[0]
+
+    exact = [run(i) for i in range(args.repeat)]
+    t_exact, _ = timeit(run, args.repeat)
+    engine.neighbors = graph
+    t_graph, _ = timeit(run, args.repeat)
+    approx = [run(i) for i in range(args.repeat)]
+    recall = np.mean([len(np.intersect1d(a, b)) / max(len(a), 1) for a, b in zip(exact, approx)])
+    print(f"catalog={args.n:,}  K={args.graph_k}  graph={graph.nbytes / 2**20:.1f} MiB  build={t_build:.1f} s")
+    print(f"exact scoring   : {t_exact * 1e3:8.2f} ms/query")
+    print(f"neighbor merge  : {t_graph * 1e3:8.2f} ms/query  ({t_exact / t_graph:.1f}× faster)")
+    print(f"recall@{args.k} vs exact = {recall:.3f}")
+
+
+def bench_ann(args):
+    engine = ScoringEngine(fit_field_models(*synthetic_field_texts(args.n, args.seed)))
+    rng = np.random.default_rng(args.seed)
+    recency = rng.choice([0.0, 0.2, 0.4, 0.6, 0.8, 1.0], size=args.n)
+    weights, w_recency = (0.45, 0.30, 0.15, 0.10), args.w_recency
+    seeds = rng.integers(0, args.n, size=args.repeat)
+
+    t = time.perf_counter()
+    engine.ann = build_ann_index(engine, n_components=args.components, n_lists=args.lists, seed=args.seed)
+    t_build = time.perf_counter() - t
+
+    def exact(i):
+        return similar_items(engine, seeds[i], weights, recency, w_recency, args.k, exact=False)[0]
+
+    t_exact, _ = timeit(exact, args.repeat)
+    truth = [exact(i) for i in range(args.repeat)]
+    print(f"catalog={args.n:,}  lists={engine.ann.n_lists}  dims={engine.ann.z_offsets[-1]}  "
+          f"index={engine.ann.nbytes / 2**20:.1f} MiB  build={t_build:.1f} s")
+    print(f"{'mode':>12} {'ms/query':>9} {'recall@' + str(args.k):>9}")
+    print(f"{'exact':>12} {t_exact * 1e3:9.2f} {1.0:9.3f}")
+    for nprobe in args.nprobe:
+        def approx(i):
+            return ann_similar_items(engine, seeds[i], weights, recency, w_recency, args.k, nprobe=nprobe)[0]
+        t_ann, _ = timeit(approx, args.repeat)
+        got = [approx(i) for i in range(args.repeat)]
+        recall = np.mean([len(np.intersect1d(a, b)) / max(len(a), 1) for a, b in zip(truth, got)])
+        print(f"{'nprobe=' + str(nprobe):>12} {t_ann * 1e3:9.2f} {recall:9.3f}")
+
+
+def bench_ingest(args):
+    print(f"input={args.path}")
+    print(f"{'workers':>8} {'books':>10} {'s':>8} {'books/s':>10}")
+    base = None
+    for w in args.workers:
+        t = time.perf_counter()
+        digest, catalog = stream_catalog_file(args.path, workers=w)
+        dt = time.perf_counter() - t
+        base = base or dt
+        print(f"{w:>8} {len(catalog):>10,} {dt:8.2f} {len(catalog) / dt:10,.0f}  ({base / dt:.2f}× vs first)")
+
+
+def bench_stream(args):
+    """iter_graph/iter_jsonl을 작은 읽기 조각 크기마다 json.loads 결과와 비교 (조각 경계에 걸린 숫자·문자열·이스케이프)"""
+    import io, json
+    from catalog import iter_graph, iter_jsonl
+    books = [{"@id": "a", "title": "도서관학 \"입문\"", "n": 1.5e10, "p": -0.25, "e": 3E-7, "x": [1, 2.0, -3e+2]},
+             {"@id": "b", "title": "😀 \\u", "n": 12345678901234567890, "ok": True, "none": None, "f": 0.1}]
+    docs = [{"x": 1.5e10, "@context": {"v": -2.5E-3}, "@graph": books, "y": 7},
+            {"@graph": [], "n": 1.0}, {"n": 42, "@graph": books}]
+    failed = 0
+    for size in args.chunk_sizes:
+        for doc in docs:
+            for text in (json.dumps(doc, ensure_ascii=False), json.dumps(doc, ensure_ascii=False, indent=1)):
+                try:
+                    got = list(iter_graph(io.BytesIO(text.encode("utf-8")), chunk_size=size))
+                except ValueError as e:
+                    got = e
+                failed += got != json.loads(text)["@graph"]
+        lines = "\n".join(json.dumps(b, ensure_ascii=False) for b in books) + "\n"
+        failed += list(iter_jsonl(io.BytesIO(lines.encode("utf-8")), chunk_size=size)) != books
+    print(f"chunk sizes {args.chunk_sizes}: {'OK' if not failed else f'{failed} mismatches'}")
+    return 1 if failed else 0
+
+
+def synthetic_titles(n, seed=0):
+    """주제어 + 임의 한글 음절 단어 + 권차로 이루어진 제목"""
+    rng = np.random.default_rng(seed)
+    syll = np.array([chr(0xAC00 + i) for i in rng.choice(11172, size=400, replace=False)])
+    words = ["".join(rng.choice(syll, size=rng.integers(2, 5))) for _ in range(5000)]
+    titles = []
+    for i in range(n):
+        parts = list(rng.choice(words, size=rng.integers(1, 4)))
+        if rng.random() < 0.3: parts.insert(0, str(rng.choice(SUBJECTS)))
+        if rng.random() < 0.1: parts.append(f"Vol.{rng.integers(1, 20)}")
+        titles.append(" ".join(parts))
+    return titles
+
+
+def bench_title(args):
+    titles = synthetic_titles(args.n, args.seed)
+    t = time.perf_counter()
+    index = build_title_index(titles)
+    t_build = time.perf_counter() - t
+    print(f"titles={args.n:,}  grams={len(index.grams):,}  index={index.nbytes / 2**20:.1f} MiB  build={t_build:.1f} s")
+    print(f"{'query':>14} {'hits':>8} {'scan ms':>9} {'index ms':>9}  same")
+    for q in args.query:
+        def scan(_):
+            ql = q.strip().lower()
+            return [i for i, t in enumerate(titles) if ql in t.lower()]
+        t_old, a = timeit(scan, 1)
+        t_new, b = timeit(lambda _: index.search(q, titles), args.repeat)
+        print(f"{q:>14} {len(b):>8,} {t_old * 1e3:9.1f} {t_new * 1e3:9.3f}  {a == b.tolist()}")
+
+
+def bench_hashing(args):
+    texts = synthetic_field_texts(args.n, args.seed, vocab_size=args.vocab)
+    weights = (0.45, 0.30, 0.15, 0.10)
+    rng = np.random.default_rng(args.seed)
+    seeds = rng.integers(0, args.n, size=args.repeat)
+    queries = [texts[1][i] for i in seeds]
+    print(f"catalog={args.n:,}  desc vocab≈{args.vocab:,}")
+    print(f"{'mode':>12} {'count s':>8} {'refit s':>8} {'counter MiB':>12} {'model MiB':>10} "
+          f"{'query µs':>9} {'×vocab':>7} {'recall@' + str(args.k):>9}")
+    truth = t_vocab = None
+    for bits in [None] + args.features:
+        n_features = 2 ** bits if bits else None
+        t = time.perf_counter()
+        counts = count_catalog(*texts, n_features=n_features)
+        t_count = time.perf_counter() - t
+        t = time.perf_counter()
+        engine = ScoringEngine(refit_from_counts(counts, slice(None)))
+        t_refit = time.perf_counter() - t
+        timeit(lambda i: engine.transform_query(queries[i]), args.repeat)   # 토큰 열 캐시를 채운 뒤 잰다
+        t_q, _ = timeit(lambda i: engine.transform_query(queries[i]), args.repeat)
+        got = [top_k(engine.score_item(i, weights), args.k, exclude=[i]) for i in seeds]
+        truth = truth or got
+        t_vocab = t_vocab or t_q       # 해싱 모드 질의 변환 시간 / 어휘 모드 (>1이면 해싱이 느림)
+        recall = np.mean([len(np.intersect1d(a, b)) / max(len(a), 1) for a, b in zip(truth, got)])
+        mode = f"hash 2^{bits}" if bits else "vocabulary"
+        print(f"{mode:>12} {t_count:8.2f} {t_refit:8.2f} {(counts.nbytes - sum(sparse_nbytes(C) for C in counts.counts.values())) / 2**20:12.2f} "
+              f"{engine.models.nbytes / 2**20:10.1f} {t_q * 1e6:9.0f} {t_q / t_vocab:7.2f} {recall:9.3f}")
+
+
+def synthetic_catalog_books(n, seed=0):
+    """synthetic_field_texts를 원본 도서 dict 형태로 (제목/주제/설명/저자/출판사/쪽수)"""
+    subj, desc, auth, pub = synthetic_field_texts(n, seed)
+    return [{"title": f"도서{seed}-{i}", "subject": s.split(), "description": d, "creator": a,
+             "publisher": p, "extent": f"{100 + i % 500} p."}
+            for i, (s, d, a, p) in enumerate(zip(subj, desc, auth, pub))]
+
+
+def bench_incremental(args):
+    base = synthetic_catalog_books(args.n, args.seed)
+    new = synthetic_catalog_books(args.add, args.seed + 1)
+    t = time.perf_counter()
+    index = CatalogIndex.build(catalog_from_books(base))
+    index.fit()
+    t_build = time.perf_counter() - t
+    t = time.perf_counter()
+    index.add_books(new)
+    t_add = time.perf_counter() - t
+    t = time.perf_counter()
+    models = index.fit()
+    t_fit = time.perf_counter() - t
+    index.remove(np.arange(0, args.n, 2))       # 절반 삭제 → compact
+    t = time.perf_counter()
+    index.compact()
+    t_compact = time.perf_counter() - t
+    ref = refit_from_counts(count_catalog(*index.catalog.field_texts()), slice(None))
+    same = all((abs(index.fit().matrices[f] - ref.matrices[f]) > 1e-12).nnz == 0
+               and index.counts.counters[f].vocabulary_ == ref.vectorizers[f].counter.vocabulary_ for f in FIELDS)
+    print(f"catalog={args.n:,}  add={args.add:,}  stacked nnz={sum(X.nnz for X in models.matrices.values()):,}")
+    print(f"full build (tokenize + fit)   : {t_build:8.2f} s")
+    print(f"add_books (new rows only)     : {t_add:8.2f} s  ({t_build / t_add:.0f}× faster)")
+    print(f"refit from counts (IDF/L2)    : {t_fit:8.2f} s")
+    print(f"compact (drop {args.n // 2:,} rows)   : {t_compact:8.2f} s")
+    print(f"compacted == rebuilt from live books: {same}")
+
+
+def bench_batch(args):
+    texts = synthetic_field_texts(args.n, args.seed)
+    engine = ScoringEngine(fit_field_models(*texts))
+    rng = np.random.default_rng(args.seed)
+    recency = rng.choice([0.0, 0.2, 0.4, 0.6, 0.8, 1.0], size=args.n)
+    weights, w_recency = (0.45, 0.30, 0.15, 0.10), 0.30
+    seeds = rng.integers(0, args.n, size=args.queries)
+    queries = [" ".join(rng.choice(SUBJECTS, size=2)) + " " + texts[1][i][:40] for i in seeds]
+    m = min(args.loop, args.queries)     # 한 건씩 경로는 앞 m건만 (처리량 비교용)
+
+    def one_item(i):
+        final = (1 - w_recency) * engine.score_item(seeds[i], weights) + w_recency * recency
+        return top_k(final, args.k, exclude=[seeds[i]])
+
+    def one_query(i):
+        final = (1 - w_recency) * engine.score_query(queries[i], weights) + w_recency * recency
+        return top_k(final, args.k)
+
+    print(f"catalog={args.n:,}  queries={args.queries:,}  k={args.k}  stacked nnz={engine.stacked.nnz:,}")
+    print(f"{'path':>28} {'queries/s':>10} {'same top-k':>11}")
+    for kind, one, batch, inputs in (("seed", one_item, recommend_items, seeds),
+                                     ("keyword", one_query, recommend_queries, queries)):
+        t_one, _ = timeit(one, m)
+        ref = [one(i) for i in range(m)]
+        print(f"{kind + ' one-by-one':>28} {1 / t_one:10,.0f}")
+        for bits in args.block_cells:
+            t = time.perf_counter()
+            top, _, _ = batch(engine, inputs, weights, recency, w_recency, args.k, block_cells=2 ** bits)
+            dt = time.perf_counter() - t
+            same = np.mean([np.array_equal(top[i][top[i] >= 0], ref[i]) for i in range(m)])
+            print(f"{kind + ' batch 2^' + str(bits) + ' cells':>28} {args.queries / dt:10,.0f} {same:11.3f}")
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# 페이지보다 먼저 import하지 않도록 함수 안으로 미룬 무거운 모듈 (첫 학습/URL 요청/ANN 선택 때 로드)
+DEFERRED_MODULES = ["scipy.sparse", "sklearn.feature_extraction.text", "sklearn.preprocessing",
+                    "sklearn.cluster", "sklearn.decomposition", "requests"]
+
+
+def bench_dtype(args):
+    """float64 기준 대비 float32/float16 행렬: 모델 메모리, 적합/질의 시간, top-k 순위 일치 (0=일치, 1=기준 미달)"""
+    if args.catalog:
+        _, catalog = stream_catalog_file(args.catalog)
+    else:
+        catalog = catalog_from_books(synth.generate_books(args.n, args.seed))
+    counts = CatalogIndex.build(catalog).counts
+    n = len(catalog)
+    weights = (0.45, 0.30, 0.15, 0.10)
+    rng = np.random.default_rng(args.seed)
+    seeds = rng.integers(0, n, size=args.queries)
+    subjects = catalog.top_subjects(n=50)
+    queries = [" ".join(rng.choice(subjects, size=rng.integers(1, 3), replace=False)) for _ in range(args.queries)]
+    print(f"catalog={n:,}  queries={args.queries} seeds + {args.queries} keyword queries  k={args.k}")
+    print(f"{'dtype':>8} {'model MiB':>10} {'stacked MiB':>12} {'fit s':>6} {'seed µs':>8} {'kw µs':>7} "
+          f"{'batch q/s':>10} {'same order':>11} {'same set':>9} {'min recall':>11} {'max |Δscore|':>13}")
+    truth, ok = None, True
+    for mode in MATRIX_DTYPES:
+        t = time.perf_counter()
+        engine = ScoringEngine(refit_from_counts(counts, slice(None), field_dtype(mode)), half=mode == "float16")
+        t_fit = time.perf_counter() - t
+        t_seed, _ = timeit(lambda i: engine.score_item(int(seeds[i]), weights), len(seeds))
+        t_kw, _ = timeit(lambda i: engine.score_query(queries[i], weights), len(queries))
+        t = time.perf_counter()
+        recommend_items(engine, seeds, weights, k=args.k)
+        qps = len(seeds) / (time.perf_counter() - t)
+        got = []
+        for i in seeds:
+            sc = engine.score_item(int(i), weights)
+            top = top_k(sc, args.k, exclude=[i])
+            got.append((top, np.asarray(sc[top], dtype=np.float64)))
+        for q in queries:
+            sc = engine.score_query(q, weights)
+            top = top_k(sc, args.k)
+            got.append((top, np.asarray(sc[top], dtype=np.float64)))
+        truth = truth or got
+        same_order = np.mean([np.array_equal(a[0], b[0]) for a, b in zip(truth, got)])
+        same_set = np.mean([set(a[0].tolist()) == set(b[0].tolist()) for a, b in zip(truth, got)])
+        recall = min(len(np.intersect1d(a[0], b[0])) / max(len(a[0]), 1) for a, b in zip(truth, got))
+        # 순위가 같은 자리끼리의 점수 차 (순위가 갈린 자리는 recall로 드러남)
+        diff = max((np.abs(a[1] - b[1]).max() if len(a[1]) and np.array_equal(a[0], b[0]) else 0.0)
+                   for a, b in zip(truth, got))
+        ok &= recall >= args.min_recall
+        print(f"{mode:>8} {engine.models.nbytes / 2**20:10.1f} {sparse_nbytes(engine.stacked) / 2**20:12.1f} "
+              f"{t_fit:6.2f} {t_seed * 1e6:8.0f} {t_kw * 1e6:7.0f} {qps:10.0f} {same_order:11.3f} {same_set:9.3f} "
+              f"{recall:11.3f} {diff:13.2e}")
+    print(f"min recall@{args.k} ≥ {args.min_recall} → {'PASS' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+PRUNING_PRESETS = [
+    '{"*": {"min_df": 2}}',
+    '{"desc": {"min_df": 2, "max_df": 0.5}}',
+    '{"*": {"min_df": 2}, "desc": {"min_df": 3, "max_df": 0.3, "max_features": 20000}}',
+]
+
+
+def bench_prune(args):
+    """가지치기 설정별 필드 어휘 크기/nnz, 모델 메모리, 적합·질의 시간, 가지치기 안 한 모델 대비 recall@k"""
+    if args.catalog:
+        _, catalog = stream_catalog_file(args.catalog)
+    else:
+        catalog = catalog_from_books(synth.generate_books(args.n, args.seed))
+    counts = CatalogIndex.build(catalog).counts
+    n = len(catalog)
+    weights = (0.45, 0.30, 0.15, 0.10)
+    rng = np.random.default_rng(args.seed)
+    seeds = rng.integers(0, n, size=args.queries)
+    subjects = catalog.top_subjects(n=50)
+    queries = [" ".join(rng.choice(subjects, size=rng.integers(1, 3), replace=False)) for _ in range(args.queries)]
+    print(f"catalog={n:,}  queries={args.queries} seeds + {args.queries} keyword queries  k={args.k}")
+    print(f"{'config':>10} " + " ".join(f"{f + ' V/nnz':>17}" for f in FIELDS)
+          + f" {'model MiB':>10} {'fit s':>6} {'seed µs':>8} {'kw µs':>7} {'seed R@' + str(args.k):>9} {'kw R@' + str(args.k):>7}")
+    truth = None
+    for ci, spec in enumerate([None] + (args.pruning or PRUNING_PRESETS)):
+        pruning = parse_pruning(spec)
+        t = time.perf_counter()
+        engine = ScoringEngine(refit_from_counts(counts, slice(None), pruning=pruning))
+        t_fit = time.perf_counter() - t
+        t_seed, _ = timeit(lambda i: engine.score_item(int(seeds[i]), weights), len(seeds))
+        t_kw, _ = timeit(lambda i: engine.score_query(queries[i], weights), len(queries))
+        got = ([top_k(engine.score_item(int(i), weights), args.k, exclude=[i]) for i in seeds],
+               [top_k(engine.score_query(q, weights), args.k) for q in queries])
+        truth = truth or got
+        recall = [np.mean([len(np.intersect1d(a, b)) / max(len(a), 1) for a, b in zip(ta, ga)])
+                  for ta, ga in zip(truth, got)]
+        cells = " ".join(f"{X.shape[1]:>8,}/{X.nnz / 1e6:>7.2f}M" for X in (engine.models.matrices[f] for f in FIELDS))
+        name = "unpruned" if spec is None else f"#{ci}"
+        print(f"{name:>10} {cells} {engine.nbytes / 2**20:10.1f} {t_fit:6.2f} {t_seed * 1e6:8.0f} {t_kw * 1e6:7.0f} "
+              f"{recall[0]:9.3f} {recall[1]:7.3f}")
+    for ci, spec in enumerate(args.pruning or PRUNING_PRESETS, 1):
+        print(f"  #{ci}: {spec}")
+
+
+def page_imports(path):
+    """페이지 스크립트 최상위의 import 모듈 이름 (ast) — 첫 렌더링 전에 실행되는 import"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    mods = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            mods += [a.name for a in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            mods.append(node.module)
+    return list(dict.fromkeys(mods))
+
+
+def _fresh_python(code):
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=HERE,
+                       capture_output=True, text=True, check=True)
+    return r.stdout, r.stderr
+
+
+def _import_seconds(mods, before=()):
+    # 새 프로세스에서 before를 먼저 import한 뒤 mods import에 걸린 시간(초)
+    code = (f"import time\nimport {', '.join(before)}\n" if before else "import time\n")
+    code += f"t = time.perf_counter()\nimport {', '.join(mods)}\nprint(time.perf_counter() - t)"
+    return float(_fresh_python(code)[0].split()[-1])
+
+
+def bench_startup(args):
+    mods = page_imports(args.page)
+    # -X importtime 분해: 최상위 import(들여쓰기 0)의 누적 시간
+    _, err = _fresh_python(f"import {', '.join(mods)}")
+    top = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cum, name = line.split("|")
+        if not name[1:].startswith(" "):
+            top.append((int(cum) / 1e3, name.strip()))
+    total = [_import_seconds(mods) * 1e3 for _ in range(args.repeat)]
+    t_first = float(np.median(total))
+    print(f"page={os.path.relpath(args.page)}  top-level imports: {', '.join(mods)}")
+    print(f"{'module (import order)':>34} {'cumulative ms':>14}")
+    for ms, name in top:
+        if ms >= args.min_ms:
+            print(f"{name:>34} {ms:14.1f}")
+    print(f"time to first st.* call (fresh process, median of {args.repeat}): {t_first:.0f} ms"
+          f"  target ≤ {args.target_ms:.0f} ms  → {'PASS' if t_first <= args.target_ms else 'FAIL'}")
+    print("deferred until first use (fresh process, after the page imports):")
+    for m in DEFERRED_MODULES:
+        print(f"{m:>34} {_import_seconds([m], before=mods) * 1e3:14.1f}")
+    return 0 if t_first <= args.target_ms else 1
+
+
+# =========================
+# 종단간(end-to-end) 스위트: 합성 NLK 카탈로그(synth.py) → 로드 → 레코드 → 토큰화/적합 → 추천
+# 결과는 JSON 파일로 (회귀 추적용), --compare로 이전 결과와 단계별 비율 비교
+# =========================
+def _latency(fn, items):
+    # 항목마다 한 번씩 실행한 지연 시간 분포 (ms)
+    ts = []
+    for x in items:
+        t = time.perf_counter()
+        fn(x)
+        ts.append((time.perf_counter() - t) * 1e3)
+    return {"p50_ms": float(np.percentile(ts, 50)), "p95_ms": float(np.percentile(ts, 95)),
+            "mean_ms": float(np.mean(ts))}
+
+
+def _timed(fn):
+    t = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t, out
+
+
+def _parse_and_build(path, chunk=10_000):
+    # (파싱 초, 레코드 추출·열 적재 초) — 파싱한 chunk권마다 CatalogBuilder 적재를 따로 잰다
+    # (책 dict 목록 전체를 들고 있지 않으므로 최대 RSS에 영향이 작음)
+    parse_s = build_s = 0.0
+    b = CatalogBuilder()
+    with open(path, "rb") as f:
+        books = iter_books(f)
+        while True:
+            t, part = _timed(lambda: list(itertools.islice(books, chunk)))
+            parse_s += t
+            if not part:
+                break
+            t, _ = _timed(lambda: [b.append_book(bk) for bk in part])
+            build_s += t
+    t, _ = _timed(b.build)
+    return parse_s, build_s + t
+
+
+def suite_one(path, n, args):
+    """카탈로그 파일 하나의 단계별 시간 → dict (초 단위는 *_s, 질의 지연은 p50/p95 ms)"""
+    st = {}
+    st["parse_s"], st["build_records_s"] = _parse_and_build(path)
+    st["load_s"], (digest, catalog) = _timed(lambda: stream_catalog_file(path))
+    st["tokenize_s"], rec = _timed(lambda: Recommender.build(digest, catalog))
+    st["fit_s"], view = _timed(lambda: rec.view())
+    st["vectorizer_fit_s"] = st["tokenize_s"] + st["fit_s"]
+    st["top_keywords"] = _latency(lambda _: view.top_subjects(n=10), range(args.repeat))
+    rng = np.random.default_rng(args.seed)
+    seeds = rng.integers(0, len(view), size=args.queries).tolist()
+    subjects = view.top_subjects(n=50)
+    queries = [" ".join(rng.choice(subjects, size=rng.integers(1, 3), replace=False)) for _ in range(args.queries)]
+    st["recommend_by_book"] = _latency(lambda i: view.recommend_by_book(i, k=args.k), seeds)
+    st["recommend_by_keywords"] = _latency(lambda q: view.recommend_by_keywords(q, k=args.k), queries)
+    t, _ = _timed(lambda: view.recommend_books_batch(seeds, k=args.k))
+    st["batch_by_book_qps"] = len(seeds) / t
+    t, _ = _timed(lambda: view.recommend_keywords_batch(queries, k=args.k))
+    st["batch_by_keywords_qps"] = len(queries) / t
+    st["index_mib"] = rec.index.nbytes / 2**20
+    st["model_mib"] = view.engine.nbytes / 2**20
+    st["peak_rss_mib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # 프로세스 누적 최대
+    return {"books": int(n), "catalog_rows": len(catalog), "file": os.path.basename(path),
+            "file_bytes": os.path.getsize(path), "stages": st}
+
+
+def _flat(stages):
+    # {"a": 1, "b": {"p50_ms": 2}} → {"a": 1, "b.p50_ms": 2}
+    out = {}
+    for k, v in stages.items():
+        if isinstance(v, dict):
+            out.update({f"{k}.{kk}": vv for kk, vv in v.items()})
+        else:
+            out[k] = v
+    return out
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_suite(args):
+    import sklearn, scipy
+    os.makedirs(args.data_dir, exist_ok=True)
+    runs = []
+    for size in args.sizes:
+        n = synth.parse_size(size)
+        path = os.path.join(args.data_dir, f"synth_{n}_s{args.seed}.json")
+        if not os.path.exists(path):
+            t, _ = _timed(lambda: synth.write_catalog(path + ".tmp", n, args.seed, jsonl=False))
+            os.replace(path + ".tmp", path)
+            print(f"generated {path} ({os.path.getsize(path) / 2**20:.0f} MiB) in {t:.1f} s", file=sys.stderr)
+        run = suite_one(path, n, args)
+        runs.append(run)
+        st = run["stages"]
+        print(f"books={n:>9,}  load {st['load_s']:7.2f} s (parse {st['parse_s']:.2f} + records {st['build_records_s']:.2f})"
+              f"  fit {st['vectorizer_fit_s']:7.2f} s  book p50 {st['recommend_by_book']['p50_ms']:7.2f} ms"
+              f"  keywords p50 {st['recommend_by_keywords']['p50_ms']:7.2f} ms"
+              f"  top10 {st['top_keywords']['p50_ms']:6.2f} ms  rss {st['peak_rss_mib']:6.0f} MiB")
+    result = {
+        "suite": "end-to-end", "version": 1,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "env": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+                "numpy": np.__version__, "scipy": scipy.__version__, "sklearn": sklearn.__version__,
+                "commit": _git_commit()},
+        "params": {"seed": args.seed, "queries": args.queries, "k": args.k, "repeat": args.repeat},
+        "runs": runs,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"→ {args.out}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            prev = {r["books"]: _flat(r["stages"]) for r in json.load(f)["runs"]}
+        print(f"{'books':>9} {'stage':>28} {'previous':>10} {'current':>10} {'ratio':>7}")
+        for r in runs:
+            old = prev.get(r["books"])
+            if old is None:
+                continue
+            for k, v in _flat(r["stages"]).items():
+                if k in old and old[k]:
+                    print(f"{r['books']:>9,} {k:>28} {old[k]:10.3f} {v:10.3f} {v / old[k]:7.2f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("scoring", help="4× cosine_similarity vs fused stacked matvec")
+    p.add_argument("--n", type=int, default=100_000)
+    p.add_argument("--repeat", type=int, default=20)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_scoring)
+    p = sub.add_parser("topk", help="full argsort vs partial top-k selection")
+    p.add_argument("--n", type=int, default=1_000_000)
+    p.add_argument("--k", type=int, default=15)
+    p.add_argument("--repeat", type=int, default=10)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_topk)
+    p = sub.add_parser("neighbors", help="exact seed scoring vs precomputed neighbor graph")
+    p.add_argument("--n", type=int, default=20_000)
+    p.add_argument("--graph-k", type=int, default=50)
+    p.add_argument("--k", type=int, default=5)
+    p.add_argument("--repeat", type=int, default=200)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_neighbors)
+    p = sub.add_parser("ann", help="exact scoring vs IVF ANN candidates: latency and recall@k")
+    p.add_argument("--n", type=int, default=100_000)
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--components", type=int, default=32)
+    p.add_argument("--lists", type=int, default=None)
+    p.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    p.add_argument("--w-recency", type=float, default=0.0)
+    p.add_argument("--repeat", type=int, default=100)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_ann)
+    p = sub.add_parser("ingest", help="serial vs process-pool record extraction (JSON-LD or JSON Lines, maybe compressed)")
+    p.add_argument("path")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.set_defaults(func=bench_ingest)
+    p = sub.add_parser("stream", help="streaming @graph / JSON Lines parser vs json.loads at tiny read chunk sizes")
+    p.add_argument("--chunk-sizes", type=int, nargs="+", default=[1, 2, 3, 5, 7, 16, 64])
+    p.set_defaults(func=bench_stream)
+    p = sub.add_parser("title", help="lower()+substring scan vs bigram title index")
+    p.add_argument("--n", type=int, default=1_000_000)
+    p.add_argument("--query", nargs="+", default=["도서관", "역사", "디지털도서관", "vol.1", "관"])
+    p.add_argument("--repeat", type=int, default=20)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_title)
+    p = sub.add_parser("hashing", help="vocabulary CountVectorizer vs HashingVectorizer counts: time, memory, recall@k")
+    p.add_argument("--n", type=int, default=200_000)
+    p.add_argument("--vocab", type=int, default=200_000)
+    p.add_argument("--features", type=int, nargs="+", default=[16, 18, 20], help="log2 n_features")
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--repeat", type=int, default=50)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_hashing)
+    p = sub.add_parser("incremental", help="full re-index vs CatalogIndex.add_books + refit; compact == rebuild")
+    p.add_argument("--n", type=int, default=200_000)
+    p.add_argument("--add", type=int, default=1_000)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_incremental)
+    p = sub.add_parser("batch", help="one-query-per-call scoring vs blocked batch sparse products + per-row top-k")
+    p.add_argument("--n", type=int, default=100_000)
+    p.add_argument("--queries", type=int, default=10_000)
+    p.add_argument("--loop", type=int, default=200, help="one-by-one baseline runs on the first N queries")
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--block-cells", type=int, nargs="+", default=[20, 21, 22], help="log2 cells per score block")
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_batch)
+    p = sub.add_parser("dtype", help="float64 vs float32 (int32 indices) vs float16 scoring matrix: memory, time, ranking match")
+    p.add_argument("--n", type=int, default=100_000, help="synthetic NLK catalog size (synth.py)")
+    p.add_argument("--catalog", help="use this catalog file instead of a synthetic one")
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--min-recall", type=float, default=0.9, help="fail if any query's recall@k vs float64 is lower")
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_dtype)
+    p = sub.add_parser("prune", help="per-field vocabulary pruning: vocab size, nnz, model size, speed, recall@k vs unpruned")
+    p.add_argument("--n", type=int, default=100_000, help="synthetic NLK catalog size (synth.py)")
+    p.add_argument("--catalog", help="use this catalog file instead of a synthetic one")
+    p.add_argument("--pruning", nargs="+", help="pruning configs (JSON or JSON files; default: built-in presets)")
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_prune)
+    p = sub.add_parser("startup", help="import-time breakdown of the page's top-level imports vs a cold-start target")
+    p.add_argument("--page", default=os.path.join(HERE, "verify.py"))
+    p.add_argument("--target-ms", type=float, default=600.0, help="time-to-first-render budget for the imports")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--min-ms", type=float, default=1.0, help="hide top-level imports faster than this")
+    p.set_defaults(func=bench_startup)
+    p = sub.add_parser("suite", help="end-to-end stages on synthetic NLK catalogs → JSON results for regression tracking")
+    p.add_argument("--sizes", nargs="+", default=["1k", "100k", "1m"], help="catalog sizes (1k / 100k / 1m / integer)")
+    p.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "b-rec-bench"),
+                   help="generated catalogs are cached here")
+    p.add_argument("--out", default="bench_results.json")
+    p.add_argument("--compare", help="previous results file: print per-stage ratios")
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--repeat", type=int, default=20)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_suite)
+    args = ap.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,587 @@
+"""국립중앙도서관 JSON-LD 카탈로그 로딩과 레코드 변환 (Streamlit 비의존)"""
+import json, re, os, io, sys, codecs, hashlib, gzip, bz2, posixpath, subprocess, threading
+from array import array
+from urllib.parse import urlsplit
+import numpy as np
+
+# =========================
+# 유틸
+# =========================
+def to_text(v):
+    if v is None: return ""
+    if isinstance(v, str): return v
+    if isinstance(v, (int, float, bool)): return str(v)
+    if isinstance(v, list): return " ".join(to_text(x) for x in v)
+    if isinstance(v, dict): return " ".join(to_text(x) for x in v.values())
+    return str(v)
+
+def to_list(v):
+    if v is None: return []
+    if isinstance(v, list):
+        out = []
+        for x in v:
+            if isinstance(x, str): s = x.strip(); 
+            elif isinstance(x, dict): s = to_text(list(x.values())).strip()
+            else: s = to_text(x).strip()
+            if s: out.append(s)
+        return out
+    if isinstance(v, dict):
+        return [to_text(x).strip() for x in v.values() if to_text(x).strip()]
+    if isinstance(v, str):
+        return [v.strip()] if v.strip() else []
+    s = to_text(v).strip()
+    return [s] if s else []
+
+YEAR_RE = re.compile(r"(19|20)\d{2}")
+PAGES_RE = re.compile(r"(\d+)\s*p\b", re.IGNORECASE)
+
+def extract_year(book):
+    for c in [to_text(book.get("issuedYear")),
+              to_text(book.get("issued")),
+              to_text(book.get("datePublished")),
+              to_text(book.get("publicationDate"))]:
+        m = YEAR_RE.search(c or "")
+        if m:
+            try: return int(m.group(0))
+            except: pass
+    return None
+
+def extract_pages(book):
+    ext = to_list(book.get("extent"))
+    found = []
+    for token in ext:
+        for m in PAGES_RE.finditer(token):
+            try: found.append(int(m.group(1)))
+            except: pass
+    return max(found) if found else None
+
+_INT64_MAX = 2**63 - 1
+
+# =========================
+# 데이터 변환
+# =========================
+def text_fields(bk):
+    # 추천/표시에 쓰는 문자열 필드 (연도·쪽수 제외)
+    return {
+        "title": to_text(bk.get("title")) or "(제목 없음)",
+        "subjects": to_list(bk.get("subject")),
+        "desc": to_text(bk.get("description")),
+        "creator": to_text(bk.get("creator")),
+        "publisher": to_text(bk.get("publisher")),
+    }
+
+def compact_record(bk):
+    # 추천/표시에 쓰는 필드만 (원본 dict는 들고 있지 않음)
+    return dict(text_fields(bk), year=extract_year(bk), pages=extract_pages(bk))
+
+# =========================
+# 스트리밍 수집: @graph 배열(또는 JSON Lines)을 원소 단위로 읽어 바로 compact 레코드로
+# (문서 전체 문자열이나 전체 dict 트리를 메모리에 올리지 않음)
+# =========================
+STREAM_CHUNK = 1 << 20            # 한 번에 읽는 바이트 수
+STREAM_MAX_VALUE = 64 << 20       # 원소 하나가 이 글자 수를 넘으면 손상된 입력으로 간주
+_WS = " \t\n\r"
+_NUMBER_CONT = "0123456789.eE+-"  # 숫자 뒤에 이어질 수 있는 글자 — 완결된 JSON 값 뒤에는 올 수 없음
+_DECODER = json.JSONDecoder()
+
+class _TextStream:
+    """바이트(또는 텍스트) 스트림을 증분 디코딩해 버퍼로 제공 — 소비한 앞부분은 주기적으로 버림"""
+
+    def __init__(self, fp, chunk_size=STREAM_CHUNK):
+        self.fp, self.chunk_size = fp, chunk_size
+        self.dec = codecs.getincrementaldecoder("utf-8-sig")()
+        self.buf, self.pos, self.eof, self.started = "", 0, False, False
+
+    def fill(self):
+        data = self.fp.read(self.chunk_size)
+        if not data:
+            self.buf += self.dec.decode(b"", final=True)
+            self.eof = True
+            return False
+        if isinstance(data, str):
+            data = data if self.started else data.lstrip("\ufeff")
+            self.buf += data
+        else:
+            self.buf += self.dec.decode(data)
+        self.started = True
+        return True
+
+    def compact(self):
+        if self.pos > self.chunk_size:
+            self.buf, self.pos = self.buf[self.pos:], 0
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self.fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, chars):
+        c = self.peek()
+        if not c or c not in chars:
+            raise json.JSONDecodeError(f"Expecting one of {chars!r}", self.buf, self.pos)
+        self.pos += 1
+        return c
+
+    def value(self, raw=False):
+        """다음 JSON 값 — raw면 파싱한 객체 대신 원문 텍스트 조각"""
+        while True:
+            self.peek()
+            try:
+                start = self.pos
+                obj, end = _DECODER.raw_decode(self.buf, start)
+                # 숫자처럼 버퍼 끝에서 잘렸을 수 있는 값("1." / "1.5e")은 숫자를 이어 갈 수 없는 글자가
+                # 뒤에 올 때(또는 EOF)만 확정 — raw_decode는 "1.5e"의 앞부분 "1"도 완결된 숫자로 받음
+                if self.eof or (end < len(self.buf) and self.buf[end] not in _NUMBER_CONT):
+                    self.pos = end
+                    return self.buf[start:end] if raw else obj
+            except json.JSONDecodeError:
+                if self.eof or len(self.buf) - self.pos > STREAM_MAX_VALUE:
+                    raise
+            self.fill()
+
+def iter_graph(fp, chunk_size=STREAM_CHUNK, raw=False):
+    """최상위 객체의 "@graph" 배열 원소(도서 dict)를 하나씩 yield — fp는 read(n)을 가진 스트림
+    (raw면 원소의 JSON 원문 텍스트를 yield)
+
+    최상위가 객체가 아니거나 "@graph"가 배열이 아니면 아무것도 내지 않는다. 객체가 아닌 원소는 건너뜀(iter_jsonl과 같음).
+    최상위 객체가 닫힌 뒤의 내용은 읽지 않는다(json.JSONDecoder.raw_decode처럼 뒤쪽 군더더기 허용).
+    """
+    s = _TextStream(fp, chunk_size)
+    if s.peek() != "{": return
+    s.pos += 1
+    if s.peek() == "}": return
+    while True:
+        key = s.value()
+        s.expect(":")
+        if key == "@graph" and s.peek() == "[":
+            s.pos += 1
+            if s.peek() == "]":
+                s.pos += 1
+            else:
+                while True:
+                    bk = s.value(raw)
+                    if isinstance(bk, dict) or (raw and bk.startswith("{")):
+                        yield bk
+                    s.compact()
+                    if s.expect(",]") == "]": break
+        else:
+            s.value()  # "@context" 등 다른 키의 값은 읽고 버림
+        if s.expect(",}") == "}": return
+
+def iter_jsonl(fp, chunk_size=STREAM_CHUNK):
+    """JSON Lines(한 줄에 도서 객체 하나)의 객체를 하나씩 yield — 객체가 아닌 줄은 건너뜀"""
+    s = _TextStream(fp, chunk_size)
+    while s.peek():
+        bk = s.value()
+        s.compact()
+        if isinstance(bk, dict):
+            yield bk
+
+# =========================
+# 압축 입력: 앞 몇 바이트(매직 넘버)로 gzip/bz2/zstd를 판별해 스트리밍으로 풀면서 읽음
+# (압축을 푼 전체 내용을 메모리에 올리지 않음). zstd는 zstandard 패키지가 있을 때만.
+# =========================
+_MAGIC = ((b"\x1f\x8b", "gzip"), (b"BZh", "bz2"), (b"\x28\xb5\x2f\xfd", "zstd"))
+COMPRESSED_SUFFIXES = {".gz": "gzip", ".bz2": "bz2", ".zst": "zstd"}
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+
+class _PrefixedReader:
+    """판별용으로 미리 읽은 앞부분을 되돌려 놓은 스트림"""
+
+    def __init__(self, head, fp):
+        self.head, self.fp = head, fp
+
+    def read(self, n=-1):
+        if not self.head:
+            return self.fp.read(n)
+        if n is None or n < 0:
+            data, self.head = self.head + self.fp.read(), self.head[:0]
+            return data
+        data, self.head = self.head[:n], self.head[n:]
+        return data
+
+def decompressing_reader(fp):
+    """압축 형식이면 풀어서 읽는 스트림을, 아니면 원래 내용 그대로 읽는 스트림을 반환"""
+    head = fp.read(4)
+    fp = _PrefixedReader(head, fp)
+    if isinstance(head, str):
+        return fp
+    kind = next((k for magic, k in _MAGIC if head.startswith(magic)), None)
+    if kind == "gzip":
+        return gzip.GzipFile(fileobj=fp, mode="rb")
+    if kind == "bz2":
+        return bz2.BZ2File(fp, mode="rb")
+    if kind == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd 압축 입력을 읽으려면 zstandard 패키지가 필요합니다 (pip install zstandard)")
+        return zstandard.ZstdDecompressor().stream_reader(fp, read_across_frames=True)
+    return fp
+
+def is_jsonl_name(name):
+    """파일 이름/URL 경로가 JSON Lines인지 (.jsonl/.ndjson, 압축 확장자는 무시)"""
+    name = (name or "").lower()
+    base, ext = posixpath.splitext(name)
+    if ext in COMPRESSED_SUFFIXES:
+        name = base
+    return name.endswith(JSONL_SUFFIXES)
+
+def iter_books(fp, jsonl=False, chunk_size=STREAM_CHUNK):
+    """(압축일 수 있는) 스트림 → 도서 dict를 하나씩 — JSON-LD @graph 또는 JSON Lines"""
+    fp = decompressing_reader(fp)
+    return iter_jsonl(fp, chunk_size) if jsonl else iter_graph(fp, chunk_size)
+
+class HashingReader:
+    """read()로 지나가는 바이트의 SHA-256을 함께 계산하는 얇은 래퍼"""
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.sha = hashlib.sha256()
+
+    def read(self, n=-1):
+        data = self.fp.read(n)
+        self.sha.update(data)
+        return data
+
+    def hexdigest(self):
+        return self.sha.hexdigest()
+
+def stream_catalog(fp, jsonl=False, chunk_size=STREAM_CHUNK, workers=1):
+    """스트림 → Catalog (레코드를 하나씩 열에 쌓으므로 레코드 목록도 만들지 않음)
+
+    workers > 1 (또는 None = CPU 수)이면 parallel_catalog로 레코드 추출을 프로세스 풀에 나눈다.
+    """
+    if workers != 1:
+        return parallel_catalog(fp, jsonl, workers, chunk_size=chunk_size)
+    b = CatalogBuilder()
+    for bk in iter_books(fp, jsonl, chunk_size):
+        b.append_book(bk)
+    return b.build()
+
+def stream_catalog_file(path: str, jsonl=None, workers=1):
+    """(내용 해시, Catalog) — 파일을 조각 단위로 읽음 (jsonl=None이면 파일 이름으로 판별)
+
+    내용 해시는 디스크의 (압축된) 바이트 기준이다.
+    """
+    if jsonl is None: jsonl = is_jsonl_name(path)
+    with open(path, "rb") as f:
+        reader = HashingReader(f)
+        catalog = stream_catalog(reader, jsonl, workers=workers)
+        while reader.read(STREAM_CHUNK): pass  # 최상위 객체 뒤 나머지도 해시에 포함
+    return reader.hexdigest(), catalog
+
+def stream_catalog_url(url: str, timeout=20, jsonl=None):
+    """(내용 해시, Catalog) — HTTP 응답 본문을 스트리밍으로 읽음 (jsonl=None이면 URL 경로로 판별)"""
+    import requests                 # 지연 import — URL 경로에서만 필요 (기동 시간)
+    if jsonl is None: jsonl = is_jsonl_name(urlsplit(url).path)
+    with requests.get(url, timeout=timeout, stream=True) as r:
+        r.raise_for_status()
+        r.raw.decode_content = True  # Content-Encoding(gzip 등)은 풀어서 읽기
+        reader = HashingReader(r.raw)
+        catalog = stream_catalog(reader, jsonl)
+        while reader.read(STREAM_CHUNK): pass
+    return reader.hexdigest(), catalog
+
+# =========================
+# 열 지향(columnar) 카탈로그 저장소
+# 레코드 dict 목록 대신 열마다 배열 하나: 정수 열은 numpy + 결측 마스크, 반복 문자열은 코드화,
+# 긴 문자열은 UTF-8 버퍼 + 오프셋. 필터/통계는 열 단위로 벡터화한다.
+# =========================
+def _gather_ranges(offsets, rows):
+    """offsets로 나뉜 구간 중 rows 구간들을 이어 붙일 때의 (원소 인덱스, 새 offsets)"""
+    starts, lens = offsets[rows], offsets[rows + 1] - offsets[rows]
+    new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lens, out=new_offsets[1:])
+    idx = np.repeat(starts - new_offsets[:-1], lens) + np.arange(new_offsets[-1])
+    return idx, new_offsets
+
+def _recode(codes, categories):
+    # 남은 코드만 처음 나온 순서로 다시 번호 매김 (처음부터 쌓은 것과 같은 코드)
+    uniq, first = np.unique(codes, return_index=True)
+    order = uniq[np.argsort(first, kind="stable")]
+    remap = np.zeros(len(categories), dtype=np.int32)
+    remap[order] = np.arange(len(order), dtype=np.int32)
+    return remap[codes], [categories[c] for c in order.tolist()]
+
+class TextColumn:
+    """UTF-8로 이어 붙인 문자열 열 — i번째 값은 buf[offsets[i]:offsets[i+1]]"""
+    __slots__ = ("buf", "offsets")
+
+    def __init__(self, buf, offsets):
+        self.buf, self.offsets = buf, offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.buf[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    def to_list(self, rows=None):
+        return [self[i] for i in (range(len(self)) if rows is None else rows)]
+
+    def take(self, rows):
+        idx, offsets = _gather_ranges(self.offsets, rows)
+        return TextColumn(np.frombuffer(self.buf, dtype=np.uint8)[idx].tobytes(), offsets)
+
+    @property
+    def nbytes(self):
+        return len(self.buf) + self.offsets.nbytes
+
+class CodedColumn:
+    """반복이 많은 문자열 열(저자/출판사) — 정수 코드 + 고유값 목록"""
+    __slots__ = ("codes", "categories")
+
+    def __init__(self, codes, categories):
+        self.codes, self.categories = codes, categories
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        return self.categories[self.codes[i]]
+
+    def to_list(self, rows=None):
+        cats = self.categories
+        return [cats[c] for c in (self.codes if rows is None else self.codes[rows])]
+
+    def take(self, rows):
+        return CodedColumn(*_recode(self.codes[rows], self.categories))
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + sum(sys.getsizeof(c) for c in self.categories)
+
+class MultiCodedColumn:
+    """행마다 값이 여러 개인 코드 열(주제어) — i번째 값들은 codes[offsets[i]:offsets[i+1]]"""
+    __slots__ = ("codes", "offsets", "categories")
+
+    def __init__(self, codes, offsets, categories):
+        self.codes, self.offsets, self.categories = codes, offsets, categories
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        cats = self.categories
+        return [cats[c] for c in self.codes[self.offsets[i]:self.offsets[i + 1]]]
+
+    def to_list(self, rows=None):
+        return [self[i] for i in (range(len(self)) if rows is None else rows)]
+
+    def row_ids(self):
+        """codes 각 원소가 속한 행 번호"""
+        return np.repeat(np.arange(len(self)), np.diff(self.offsets))
+
+    def take(self, rows):
+        idx, offsets = _gather_ranges(self.offsets, rows)
+        codes, categories = _recode(self.codes[idx], self.categories)
+        return MultiCodedColumn(codes, offsets, categories)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.offsets.nbytes + sum(sys.getsizeof(c) for c in self.categories)
+
+class Catalog:
+    """열 지향 도서 카탈로그 — year/pages는 int64 배열 + has_year/has_pages 마스크(없으면 0)"""
+    __slots__ = ("title", "subjects", "desc", "creator", "publisher",
+                 "year", "has_year", "pages", "has_pages")
+
+    def __init__(self, title, subjects, desc, creator, publisher, year, has_year, pages, has_pages):
+        self.title, self.subjects, self.desc = title, subjects, desc
+        self.creator, self.publisher = creator, publisher
+        self.year, self.has_year, self.pages, self.has_pages = year, has_year, pages, has_pages
+
+    def __len__(self):
+        return len(self.year)
+
+    def record(self, i):
+        """compact_record와 같은 모양의 dict"""
+        return {
+            "title": self.title[i], "subjects": self.subjects[i], "desc": self.desc[i],
+            "creator": self.creator[i], "publisher": self.publisher[i],
+            "year": int(self.year[i]) if self.has_year[i] else None,
+            "pages": int(self.pages[i]) if self.has_pages[i] else None,
+        }
+
+    def subject_texts(self, rows=None):
+        return [" ".join(s) for s in self.subjects.to_list(rows)]
+
+    def field_texts(self, rows=None):
+        """features.FIELDS 순서(주제/설명/저자/출판사)의 말뭉치 네 목록"""
+        return (self.subject_texts(rows), self.desc.to_list(rows),
+                self.creator.to_list(rows), self.publisher.to_list(rows))
+
+    def take(self, rows):
+        """rows 행만 순서대로 담은 새 Catalog (처음부터 그 행들로 쌓은 것과 같음)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        return Catalog(self.title.take(rows), self.subjects.take(rows), self.desc.take(rows),
+                       self.creator.take(rows), self.publisher.take(rows),
+                       self.year[rows], self.has_year[rows], self.pages[rows], self.has_pages[rows])
+
+    def top_subjects(self, mask=None, n=10):
+        """mask 행들의 주제어 빈도 상위 n개 (동점은 먼저 나온 순 — Counter.most_common과 같음)"""
+        codes = self.subjects.codes
+        if mask is not None:
+            codes = codes[np.asarray(mask)[self.subjects.row_ids()]]
+        if not len(codes):
+            return []
+        uniq, first, counts = np.unique(codes, return_index=True, return_counts=True)
+        order = np.lexsort((first, -counts))[:n]
+        return [self.subjects.categories[c] for c in uniq[order]]
+
+    @property
+    def nbytes(self):
+        cols = (self.title, self.subjects, self.desc, self.creator, self.publisher)
+        arrays = (self.year, self.has_year, self.pages, self.has_pages)
+        return sum(c.nbytes for c in cols) + sum(a.nbytes for a in arrays)
+
+class CatalogBuilder:
+    """원본 도서 dict를 한 건씩 받아 열에 쌓는다 (문자열 인터닝, array 모듈로 압축 저장)"""
+
+    def __init__(self):
+        self._text = {k: (bytearray(), array("q", [0])) for k in ("title", "desc")}
+        self._coded = {k: (array("i"), {}) for k in ("creator", "publisher")}
+        self._subj_codes, self._subj_offsets, self._subj_cats = array("i"), array("q", [0]), {}
+        self._year, self._has_year = array("q"), bytearray()
+        self._pages, self._has_pages = array("q"), bytearray()
+
+    def append_book(self, bk):
+        rec = compact_record(bk)
+        for k, (buf, offs) in self._text.items():
+            buf += rec[k].encode("utf-8")
+            offs.append(len(buf))
+        for k, (codes, cats) in self._coded.items():
+            codes.append(cats.setdefault(rec[k], len(cats)))
+        for s in rec["subjects"]:
+            self._subj_codes.append(self._subj_cats.setdefault(s, len(self._subj_cats)))
+        self._subj_offsets.append(len(self._subj_codes))
+        for vals, has, v in ((self._year, self._has_year, rec["year"]),
+                             (self._pages, self._has_pages, rec["pages"])):
+            vals.append(0 if v is None else min(v, _INT64_MAX))
+            has.append(v is not None)
+
+    def build(self):
+        def ints(a, dtype=np.int64):
+            return np.frombuffer(a, dtype=dtype).copy() if len(a) else np.zeros(0, dtype=dtype)
+
+        text = {k: TextColumn(bytes(buf), ints(offs)) for k, (buf, offs) in self._text.items()}
+        coded = {k: CodedColumn(ints(codes, np.int32), list(cats)) for k, (codes, cats) in self._coded.items()}
+        subjects = MultiCodedColumn(ints(self._subj_codes, np.int32), ints(self._subj_offsets), list(self._subj_cats))
+        return Catalog(text["title"], subjects, text["desc"], coded["creator"], coded["publisher"],
+                       ints(self._year), ints(self._has_year, np.bool_),
+                       ints(self._pages), ints(self._has_pages, np.bool_))
+
+def catalog_from_books(books):
+    """원본 도서 dict 목록 → Catalog (stream_catalog과 같은 추출)"""
+    b = CatalogBuilder()
+    for bk in books:
+        b.append_book(bk)
+    return b.build()
+
+# =========================
+# 병렬 수집: 입력을 원소 묶음(JSON Lines 텍스트 블록)으로 나눠 프로세스 풀에서
+# 파싱 + 레코드 추출 + 부분 Catalog 생성, 제출 순서대로 이어 붙인다 (결과는 직렬 경로와 같음)
+# JSON Lines는 줄 경계에서 바이트 그대로 자르고, JSON-LD @graph는 메인 프로세스가
+# 원소 경계만 찾아(raw_decode) 원문 텍스트를 넘긴다 — 이 경계 탐색은 직렬로 남는다.
+# =========================
+PARALLEL_BATCH_BYTES = 4 << 20    # 작업 하나에 넘기는 원문 크기
+
+def _jsonl_batches(fp, batch_bytes):
+    fp, rest = decompressing_reader(fp), b""
+    while True:
+        data = fp.read(batch_bytes)
+        if not data: break
+        if isinstance(data, str): data = data.encode("utf-8")
+        data = rest + data
+        cut = data.rfind(b"\n") + 1
+        rest = data[cut:]
+        if cut: yield data[:cut]
+    if rest.strip(): yield rest
+
+def _graph_batches(fp, batch_bytes, chunk_size):
+    parts, size = [], 0
+    for text in iter_graph(decompressing_reader(fp), chunk_size, raw=True):
+        parts.append(text)
+        size += len(text)
+        if size >= batch_bytes:
+            yield "\n".join(parts)
+            parts, size = [], 0
+    if parts: yield "\n".join(parts)
+
+def _feed_batches(batches, fp, errors):
+    # 도우미의 표준 입력으로 묶음을 보내는 스레드 — 결과를 읽는 쪽과 파이프가 서로 막히지 않도록.
+    # 입력 파싱 오류는 errors에 담아 호출한 쪽에서 다시 올린다
+    from ingestworker import write_frame
+    try:
+        with fp:
+            for block in batches:
+                write_frame(fp, block)
+    except BrokenPipeError:
+        pass                            # 도우미가 먼저 끝남(작업 오류) — 결과 프레임으로 보고됨
+    except Exception as e:
+        errors.append(e)
+
+def parallel_catalog(fp, jsonl=False, workers=None, batch_bytes=PARALLEL_BATCH_BYTES, chunk_size=STREAM_CHUNK):
+    """스트림 → Catalog, 레코드 추출을 workers개 프로세스에 나눠서 (None = CPU 수)
+
+    풀은 별도 도우미 프로세스(ingestworker.py)가 만들고, 이 프로세스는 원소 경계 탐색과 이어 붙이기만 한다
+    (서버 스레드에서 풀을 직접 열면 spawn 자식이 페이지 스크립트를 다시 실행함).
+    동시에 처리 중인 묶음은 2·workers개로 제한해 입력 전체를 메모리에 올리지 않는다.
+    """
+    from ingestworker import read_frame
+    workers = workers or os.cpu_count() or 1
+    batches = _jsonl_batches(fp, batch_bytes) if jsonl else _graph_batches(fp, batch_bytes, chunk_size)
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ingestworker.py")
+    proc = subprocess.Popen([sys.executable, script, str(workers)], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    errors, parts = [], []
+    feeder = threading.Thread(target=_feed_batches, args=(batches, proc.stdin, errors), daemon=True)
+    feeder.start()
+    with proc.stdout:
+        while (frame := read_frame(proc.stdout)) is not None:
+            ok, value = frame
+            if not ok:
+                errors.append(value)
+                break
+            parts.append(value)
+    feeder.join()
+    if proc.wait() and not errors:
+        raise RuntimeError(f"병렬 수집 도우미가 비정상 종료했습니다 (종료 코드 {proc.returncode})")
+    if errors:
+        raise errors[0]
+    return concat_catalogs(parts)
+
+def _concat_offsets(offsets_list):
+    out, base = [np.zeros(1, dtype=np.int64)], 0
+    for offs in offsets_list:
+        out.append(offs[1:] + base)
+        base += int(offs[-1])
+    return np.concatenate(out)
+
+def _merge_categories(columns):
+    # 앞 조각부터 처음 나온 순서로 코드를 매기므로 직렬로 쌓은 것과 코드가 같다
+    index, maps = {}, []
+    for c in columns:
+        maps.append(np.array([index.setdefault(v, len(index)) for v in c.categories], dtype=np.int32))
+    return list(index), [m[c.codes] for m, c in zip(maps, columns)]
+
+def concat_catalogs(parts):
+    """Catalog 조각들을 순서대로 이어 붙인 Catalog"""
+    if not parts:
+        return CatalogBuilder().build()
+    def text(name):
+        cols = [getattr(p, name) for p in parts]
+        return TextColumn(b"".join(c.buf for c in cols), _concat_offsets([c.offsets for c in cols]))
+    def coded(name):
+        categories, codes = _merge_categories([getattr(p, name) for p in parts])
+        return CodedColumn(np.concatenate(codes).astype(np.int32), categories)
+    def ints(name):
+        return np.concatenate([getattr(p, name) for p in parts])
+    subj = [p.subjects for p in parts]
+    categories, codes = _merge_categories(subj)
+    subjects = MultiCodedColumn(np.concatenate(codes).astype(np.int32),
+                                _concat_offsets([c.offsets for c in subj]), categories)
+    return Catalog(text("title"), subjects, text("desc"), coded("creator"), coded("publisher"),
+                   ints("year"), ints("has_year"), ints("pages"), ints("has_pages"))
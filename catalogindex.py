@@ -0,0 +1,178 @@
+"""카탈로그 증분 갱신 — 전체 재색인 없이 도서 추가/변경/삭제
+
+새 도서와 변경된 도서만 토큰화해 필드별 카운트 행렬 아래에 행으로 덧붙이고, 변경·삭제된 행은
+live 마스크에서 끄기만 한다(tombstone). 문서빈도/IDF와 쌓은 행렬은 refit_from_counts가
+live 행의 카운트로 다시 계산하므로(토큰화 없이 O(nnz)) 추가분이 곧바로 반영된다.
+
+어휘 모드에서는 새 단어를 어휘 끝에 이어 번호를 매기므로 열이 더 이상 정렬되어 있지 않다.
+compact()는 죽은 행을 버리고 어휘를 다시 정렬해, 남은 도서로 처음부터 만든 것과 같은 상태로 되돌린다.
+maybe_compact()는 죽은 행 비율이 compact_dead_fraction을 넘을 때만 compact한다(주기적으로 호출).
+
+갱신은 항상 새 Catalog/CatalogCounts/카운터 객체를 만들어 바꿔 끼우므로(copy-on-write),
+이전 세대로 만든 모델(모델 캐시에 남은 SlicedTfidf 등)은 그대로 유효하다.
+"""
+import threading
+
+import numpy as np
+
+from catalog import catalog_from_books, concat_catalogs
+from features import FIELDS, CatalogCounts, count_catalog, refit_from_counts
+
+
+def _is_hashing(counter):
+    return not hasattr(counter, "vocabulary_")     # HashingVectorizer는 어휘 사전이 없음
+
+
+def _widen(C, n_cols):
+    return type(C)((C.data, C.indices, C.indptr), shape=(C.shape[0], n_cols))
+
+
+def _count_new(counter, texts):
+    """texts만 토큰화한 카운트 행렬과 (어휘가 늘었으면 새) 카운터 — 기존 카운터는 바꾸지 않음"""
+    import scipy.sparse as sp
+    from sklearn.base import clone
+    if _is_hashing(counter):
+        return counter, counter.transform(texts).tocsr()
+    analyze = counter.build_analyzer()
+    vocab = dict(counter.vocabulary_)
+    indices, data, indptr = [], [], [0]
+    for doc in texts:
+        tf = {}
+        for tok in analyze(doc):
+            j = vocab.setdefault(tok, len(vocab))
+            tf[j] = tf.get(j, 0) + 1
+        indices.extend(tf)
+        data.extend(tf.values())
+        indptr.append(len(indices))
+    X = sp.csr_matrix((np.array(data, dtype=np.int64), np.array(indices, dtype=np.int32), indptr),
+                      shape=(len(texts), len(vocab)))
+    X.sort_indices()
+    if len(vocab) > len(counter.vocabulary_):
+        counter = clone(counter)
+        counter.vocabulary_ = vocab
+    return counter, X
+
+
+def _compact_counts(counter, C):
+    """죽은 행을 뺀 카운트 행렬 C에서 안 쓰는 열을 버리고 어휘를 정렬 — count_catalog 결과와 같음"""
+    from sklearn.base import clone
+    if _is_hashing(counter):
+        return counter, C
+    df = np.bincount(C.indices, minlength=C.shape[1])
+    present = np.flatnonzero(df)
+    terms = [None] * C.shape[1]
+    for t, j in counter.vocabulary_.items():
+        terms[j] = t
+    order = np.array(sorted(present.tolist(), key=terms.__getitem__), dtype=np.int64)
+    remap = np.zeros(C.shape[1], dtype=C.indices.dtype)
+    remap[order] = np.arange(len(order), dtype=C.indices.dtype)
+    C = type(C)((C.data, remap[C.indices], C.indptr), shape=(C.shape[0], len(order)))
+    C.has_sorted_indices = False
+    C.sort_indices()
+    counter = clone(counter)
+    counter.vocabulary_ = {terms[j]: i for i, j in enumerate(order.tolist())}
+    return counter, C
+
+
+class CatalogIndex:
+    """Catalog + 필드별 카운트 행렬 + live 마스크 — 도서 추가/변경/삭제와 주기적 압축
+
+    행 번호는 compact() 전까지 유지되며, compact()는 옛 행 → 새 행 번호 배열(삭제된 행은 -1)을 돌려준다.
+    """
+
+    def __init__(self, catalog, counts, compact_dead_fraction=0.25):
+        self.catalog = catalog
+        self.counts = counts
+        self.live = np.ones(len(catalog), dtype=bool)
+        self.generation = 0
+        self.compact_dead_fraction = compact_dead_fraction
+        self.applied = set()           # 이미 반영한 추가분 식별자 (같은 파일 중복 반영 방지용)
+        self._lock = threading.RLock()
+
+    @classmethod
+    def build(cls, catalog, n_features=None, **kwargs):
+        return cls(catalog, count_catalog(*catalog.field_texts(), n_features=n_features), **kwargs)
+
+    @property
+    def nbytes(self):
+        return self.catalog.nbytes + self.counts.nbytes + self.live.nbytes
+
+    @property
+    def n_live(self):
+        return int(self.live.sum())
+
+    def snapshot(self):
+        """(세대, catalog, counts, live) — 한 번의 추천 계산에서 서로 맞는 묶음"""
+        with self._lock:
+            return self.generation, self.catalog, self.counts, self.live
+
+    def fit(self, mask=None):
+        """live(∧ mask) 행으로 FieldModels 재계산 — 토큰화 없이 카운트 슬라이스만"""
+        _, _, counts, live = self.snapshot()
+        return refit_from_counts(counts, live if mask is None else live & mask)
+
+    def add_books(self, books):
+        """원본 도서 dict들을 추가하고 새 행 번호 배열을 반환"""
+        import scipy.sparse as sp
+        part = catalog_from_books(books)
+        with self._lock:
+            n0 = len(self.catalog)
+            counters, mats = {}, {}
+            for f, texts in zip(FIELDS, part.field_texts()):
+                counter, X = _count_new(self.counts.counters[f], texts)
+                C = self.counts.counts[f]
+                width = max(C.shape[1], X.shape[1])
+                counters[f] = counter
+                mats[f] = sp.vstack([_widen(C, width), _widen(X, width)], format="csr")
+            self.catalog = concat_catalogs([self.catalog, part])
+            self.counts = CatalogCounts(counters, mats)
+            self.live = np.concatenate([self.live, np.ones(len(part), dtype=bool)])
+            self.generation += 1
+            return np.arange(n0, n0 + len(part))
+
+    def _check_rows(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        bad = rows[(rows < 0) | (rows >= len(self.live))]
+        if len(bad):
+            raise ValueError(f"없는 행 번호: {', '.join(map(str, bad.tolist()))}")
+        return rows
+
+    def remove(self, rows):
+        """rows 행을 삭제 표시 — 범위 밖 행이면 ValueError"""
+        with self._lock:
+            rows = self._check_rows(rows)
+            live = self.live.copy()
+            live[rows] = False
+            self.live = live
+            self.generation += 1
+
+    def update_books(self, rows, books):
+        """rows 행을 books로 바꾼다(옛 행은 삭제 표시, 새 버전은 끝에 추가) → 새 행 번호"""
+        with self._lock:
+            rows = self._check_rows(rows)        # 추가 전에 검사 — 반쯤 반영된 상태를 남기지 않음
+            new_rows = self.add_books(books)
+            self.remove(rows)
+            return new_rows
+
+    def maybe_compact(self):
+        """죽은 행 비율이 compact_dead_fraction을 넘으면 compact() 결과를, 아니면 None"""
+        with self._lock:
+            dead = len(self.live) - self.n_live
+            if dead and dead > self.compact_dead_fraction * len(self.live):
+                return self.compact()
+            return None
+
+    def compact(self):
+        """죽은 행을 버리고 어휘를 정렬 → 옛 행 → 새 행 번호 배열 (삭제된 행은 -1)"""
+        with self._lock:
+            rows = np.flatnonzero(self.live)
+            counters, mats = {}, {}
+            for f in FIELDS:
+                counters[f], mats[f] = _compact_counts(self.counts.counters[f], self.counts.counts[f][rows])
+            old_to_new = np.full(len(self.live), -1, dtype=np.int64)
+            old_to_new[rows] = np.arange(len(rows))
+            self.catalog = self.catalog.take(rows)
+            self.counts = CatalogCounts(counters, mats)
+            self.live = np.ones(len(rows), dtype=bool)
+            self.generation += 1
+            return old_to_new
@@ -0,0 +1,240 @@
+"""추천 엔진 명령줄 (Streamlit 없이 — 배치 작업/야간 다이제스트용)
+
+    python cli.py build books.jsonl.gz --out books.idx
+    python cli.py recommend-by-book books.idx --title 도서관 --k 10
+    python cli.py recommend-by-book books.idx --row 12 345 678 --format jsonl
+    python cli.py recommend-by-keywords books.idx "도서관학 저작권" "역사" --recency 0.3
+    python cli.py add books.idx new_books.jsonl
+    python cli.py update books.idx --row 12 345 --books fixed.jsonl --remap-out remap.json
+    python cli.py remove books.idx --row 12 345
+    python cli.py bench batch --n 100000
+
+색인 인자에는 build로 만든 색인 파일(.idx) 또는 카탈로그 파일 경로/URL을 줄 수 있다
+(카탈로그를 주면 그 자리에서 토큰화). 기준 도서/질의가 여러 개면 batch 경로로 한꺼번에 채점한다.
+add/update/remove는 색인 파일을 고쳐 다시 저장한다(--out이 없으면 제자리). 죽은 행이 많아져 압축되면
+행 번호가 바뀌므로 --remap-out에 옛 행 → 새 행 번호 목록(삭제된 행은 -1)을 JSON으로 남길 수 있다.
+"""
+import argparse, hashlib, json, sys, time
+
+import numpy as np
+
+from catalog import is_jsonl_name, iter_books
+from features import MATRIX_DTYPES
+from recommender import DEFAULT_W_RECENCY, DEFAULT_WEIGHTS, Recommender, normalize_weights
+
+INDEX_SUFFIX = ".idx"
+
+
+def open_recommender(source, args):
+    if source.endswith(INDEX_SUFFIX):
+        return Recommender.load(source, matrix_dtype=args.matrix_dtype, pruning=args.pruning)
+    return Recommender.from_source(source, workers=args.workers, n_features=args.hashing_features,
+                                   matrix_dtype=args.matrix_dtype, pruning=args.pruning)
+
+
+def make_view(rec, args):
+    page_range = tuple(args.pages) if args.pages else None
+    return rec.view(rec.page_mask(page_range, include_no_pages=not args.require_pages))
+
+
+def print_results(label, results, fmt, out=sys.stdout):
+    if fmt == "jsonl":
+        out.write(json.dumps({"query": label, "results": results}, ensure_ascii=False) + "\n")
+        return
+    out.write(f"# {label}\n")
+    if not results:
+        out.write("  (추천 결과 없음)\n")
+    for r in results:
+        creator = r["creator"] or "저자 정보 없음"
+        out.write(f"  {r['final_score']:.3f} {r['content_score']:.3f}  [{r['row']}] {r['title']} — {creator} "
+                  f"(연도: {r['year'] or 'N/A'}, 쪽수: {r['pages'] if r['pages'] is not None else 'N/A'})"
+                  f"  {', '.join(r['keywords'])}\n")
+
+
+def cmd_build(args):
+    t = time.perf_counter()
+    rec = Recommender.from_source(args.source, workers=args.workers, n_features=args.hashing_features)
+    t_build = time.perf_counter() - t
+    out = args.out or args.source.rsplit("/", 1)[-1].split(".", 1)[0] + INDEX_SUFFIX
+    rec.save(out)
+    n = len(rec.catalog)
+    print(f"books={n:,}  index={rec.index.nbytes / 2**20:.1f} MiB  build={t_build:.2f} s  → {out}")
+
+
+def cmd_recommend_by_book(args):
+    rec = open_recommender(args.index, args)
+    view = make_view(rec, args)
+    weights = normalize_weights(args.weights)
+    if args.title is not None:
+        pos = view.search_titles(args.title)[:args.max_matches]
+        if not len(pos):
+            print(f"제목 검색 결과가 없습니다: {args.title}", file=sys.stderr)
+            return 1
+    else:
+        rows = np.asarray(args.row, dtype=np.int64)
+        pos = np.searchsorted(view.rows, rows)
+        found = pos < len(view.rows)
+        found[found] = view.rows[pos[found]] == rows[found]
+        for r in rows[~found]:
+            print(f"행 {r}은(는) 필터를 통과한 도서가 아닙니다", file=sys.stderr)
+        pos = pos[found]
+        if not len(pos):
+            print(f"필터를 통과한 기준 도서가 없습니다: --row {' '.join(map(str, args.row))}", file=sys.stderr)
+            return 1
+    if len(pos) == 1 or args.nprobe is not None:
+        outs = [view.recommend_by_book(int(p), weights, args.recency, args.k, nprobe=args.nprobe) for p in pos]
+    else:
+        outs = zip(*view.recommend_books_batch(pos, weights, args.recency, args.k))
+    for p, out in zip(pos, outs):
+        row = int(view.rows[p])
+        print_results(f"[{row}] {view.catalog.title[row]}", view.results(*out), args.format)
+    return 0
+
+
+def cmd_recommend_by_keywords(args):
+    rec = open_recommender(args.index, args)
+    view = make_view(rec, args)
+    weights = normalize_weights(args.weights)
+    queries = list(args.query)
+    if args.queries_file:
+        with open(args.queries_file, encoding="utf-8") as f:
+            queries += [line.strip() for line in f if line.strip()]
+    if len(queries) == 1 or args.nprobe is not None:
+        outs = [view.recommend_by_keywords(q, weights, args.recency, args.k, nprobe=args.nprobe) for q in queries]
+    else:
+        outs = zip(*view.recommend_keywords_batch(queries, weights, args.recency, args.k))
+    for q, out in zip(queries, outs):
+        print_results(q, view.results(*out, picked_keywords=q.split()), args.format)
+    return 0
+
+
+def read_books(path):
+    with open(path, "rb") as f:
+        return list(iter_books(f, is_jsonl_name(path)))
+
+
+def save_edit(rec, args, remap, message):
+    rec.save(args.out or args.index)
+    if remap is not None:
+        message += "  압축됨: 행 번호가 바뀌었습니다"
+        if args.remap_out:
+            with open(args.remap_out, "w", encoding="utf-8") as f:
+                json.dump(remap.tolist(), f)
+    print(f"{message}  books={rec.index.n_live:,}  → {args.out or args.index}")
+
+
+def cmd_add(args):
+    rec = Recommender.load(args.index)
+    with open(args.books, "rb") as f:
+        key = hashlib.sha256(f.read()).hexdigest()
+    added = rec.add_books(read_books(args.books), key=key)
+    if added is None:
+        print(f"이미 반영한 파일입니다: {args.books}", file=sys.stderr)
+        return 1
+    rows, remap = added
+    save_edit(rec, args, remap, f"추가 {len(rows):,}권 (행 {rows[0]}…{rows[-1]})" if len(rows) else "추가 0권")
+
+
+def cmd_update(args):
+    rec = Recommender.load(args.index)
+    books = read_books(args.books)
+    if len(books) != len(args.row):
+        print(f"--row {len(args.row)}개와 도서 {len(books)}권의 수가 다릅니다", file=sys.stderr)
+        return 1
+    try:
+        rows, remap = rec.update_books(args.row, books)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    save_edit(rec, args, remap, f"교체 {len(rows):,}권 → 새 행 {' '.join(map(str, rows.tolist()))}")
+
+
+def cmd_remove(args):
+    rec = Recommender.load(args.index)
+    try:
+        remap = rec.remove_books(args.row)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    save_edit(rec, args, remap, f"삭제 {len(args.row):,}권")
+
+
+def cmd_bench(args):
+    import bench
+    return bench.main(args.bench_args)
+
+
+def add_index_options(p):
+    p.add_argument("--workers", type=int, default=1, help="catalog ingest processes (0 = CPU count)")
+    p.add_argument("--hashing-features", type=int, default=0, help="hashing vectorizer size (0 = vocabulary)")
+
+
+def add_edit_options(p):
+    p.add_argument("--out", help="write the edited index here (default: overwrite the index file)")
+    p.add_argument("--remap-out", help="if rows were compacted, write the old → new row list (JSON, -1 = deleted)")
+
+
+def add_query_options(p):
+    add_index_options(p)
+    p.add_argument("--matrix-dtype", choices=MATRIX_DTYPES, default="float64",
+                   help="TF-IDF matrix precision (float32: float32 data + int32 indices, float16: float16 scoring matrix)")
+    p.add_argument("--pruning", help='per-field vocabulary pruning: JSON or a JSON file, e.g. '
+                                     '\'{"desc": {"min_df": 2, "max_df": 0.5, "max_features": 50000}}\'')
+    p.add_argument("--k", type=int, default=5)
+    p.add_argument("--weights", type=float, nargs=4, default=DEFAULT_WEIGHTS, metavar=("SUBJ", "DESC", "AUTH", "PUB"))
+    p.add_argument("--recency", type=float, default=DEFAULT_W_RECENCY, help="recency weight in the final score")
+    p.add_argument("--pages", type=int, nargs=2, metavar=("MIN", "MAX"), help="page-count filter")
+    p.add_argument("--require-pages", action="store_true", help="drop books without a page count when --pages is set")
+    p.add_argument("--nprobe", type=int, default=None, help="use the ANN index with this many probed clusters")
+    p.add_argument("--format", choices=["text", "jsonl"], default="text")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("build", help="ingest a catalog and save its count index")
+    p.add_argument("source", help="catalog file path or http(s) URL (JSON-LD or JSON Lines, maybe compressed)")
+    p.add_argument("--out", help=f"index file (default: <source name>{INDEX_SUFFIX})")
+    add_index_options(p)
+    p.set_defaults(func=cmd_build)
+    p = sub.add_parser("recommend-by-book", help="books similar to seed books (by title search or row)")
+    p.add_argument("index", help=f"index file ({INDEX_SUFFIX}) or catalog path/URL")
+    g = p.add_mutually_exclusive_group(required=True)
+    g.add_argument("--title", help="title substring; every match (up to --max-matches) is a seed")
+    g.add_argument("--row", type=int, nargs="+", help="catalog row numbers")
+    p.add_argument("--max-matches", type=int, default=1)
+    add_query_options(p)
+    p.set_defaults(func=cmd_recommend_by_book)
+    p = sub.add_parser("recommend-by-keywords", help="books matching keyword queries")
+    p.add_argument("index", help=f"index file ({INDEX_SUFFIX}) or catalog path/URL")
+    p.add_argument("query", nargs="*", default=[])
+    p.add_argument("--queries-file", help="one query per line")
+    add_query_options(p)
+    p.set_defaults(func=cmd_recommend_by_keywords)
+    p = sub.add_parser("add", help="append books from a catalog file to an index file")
+    p.add_argument("index", help=f"index file ({INDEX_SUFFIX})")
+    p.add_argument("books", help="catalog file with the new books (JSON-LD or JSON Lines, maybe compressed)")
+    add_edit_options(p)
+    p.set_defaults(func=cmd_add)
+    p = sub.add_parser("update", help="replace books (by row) with new versions from a catalog file")
+    p.add_argument("index", help=f"index file ({INDEX_SUFFIX})")
+    p.add_argument("--row", type=int, nargs="+", required=True, help="catalog row numbers, in the file's book order")
+    p.add_argument("--books", required=True, help="catalog file with one replacement book per --row")
+    add_edit_options(p)
+    p.set_defaults(func=cmd_update)
+    p = sub.add_parser("remove", help="delete books (by row) from an index file")
+    p.add_argument("index", help=f"index file ({INDEX_SUFFIX})")
+    p.add_argument("--row", type=int, nargs="+", required=True, help="catalog row numbers")
+    add_edit_options(p)
+    p.set_defaults(func=cmd_remove)
+    p = sub.add_parser("bench", help="run bench.py subcommands", add_help=False)
+    p.add_argument("bench_args", nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_bench)
+    args = ap.parse_args(argv)
+    if getattr(args, "workers", 1) == 0:
+        args.workers = None
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
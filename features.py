@@ -0,0 +1,379 @@
+"""필드별 TF-IDF 모델(주제/설명/저자/출판사)과 프로세스 공용 모델 캐시
+
+Streamlit은 위젯 조작마다 verify.py를 처음부터 다시 실행하므로,
+학습된 벡터라이저·행렬은 이 모듈의 캐시에 두고 모든 세션이 재사용한다.
+scikit-learn은 가져오는 데만 1초 이상 걸리므로 실제로 학습/변환할 때 함수 안에서 import한다
+(페이지 첫 렌더링 전 기동 시간을 줄이기 위해 — bench.py startup 참고).
+"""
+import functools, json, math, os, sys, threading
+from collections import OrderedDict
+
+import numpy as np
+
+FIELDS = ("subj", "desc", "auth", "pub")
+# 행렬 정밀도 모드: "float64"(기준) / "float32"(float32 data + int32 indices) /
+# "float16"(필드 행렬은 float32, 쌓은 채점 행렬만 float16으로 보관 — scoring.HalfCSR)
+MATRIX_DTYPES = ("float64", "float32", "float16")
+
+
+def field_dtype(matrix_dtype):
+    """정밀도 모드 → 필드 TF-IDF 행렬 data dtype"""
+    if matrix_dtype not in MATRIX_DTYPES:
+        raise ValueError(f"알 수 없는 행렬 정밀도: {matrix_dtype} (가능: {', '.join(MATRIX_DTYPES)})")
+    return np.float64 if matrix_dtype == "float64" else np.float32
+
+
+def sparse_nbytes(X):
+    """CSR/CSC 행렬의 data/indices/indptr 바이트 합"""
+    return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+
+
+def vocabulary_nbytes(vec):
+    """벡터라이저 어휘 사전 + idf 배열의 대략적인 메모리 (키 문자열·정수 객체 포함)"""
+    vocab = getattr(vec, "vocabulary_", None) or {}
+    n = sys.getsizeof(vocab) + sum(sys.getsizeof(k) + 28 for k in vocab)
+    idf = getattr(vec, "idf_", None)
+    return n + (idf.nbytes if idf is not None else 0)
+
+
+def vectorizer_nbytes(vec):
+    n = getattr(vec, "nbytes", None)
+    return n if n is not None else vocabulary_nbytes(vec)
+
+
+class FieldModels:
+    """네 필드의 벡터라이저와 문서-단어 행렬 묶음"""
+    __slots__ = ("vectorizers", "matrices", "nbytes")
+
+    def __init__(self, vectorizers, matrices):
+        self.vectorizers = vectorizers
+        self.matrices = matrices
+        self.nbytes = (sum(sparse_nbytes(X) for X in matrices.values())
+                       + sum(vectorizer_nbytes(v) for v in vectorizers.values()))
+
+
+def fit_field_models(subject_texts, desc_texts, author_texts, publisher_texts, n_features=None):
+    """필드별 TfidfVectorizer 학습 — n_features를 주면 어휘 사전 없는 해싱 모드 (make_counter 참고)"""
+    if n_features:
+        counts = count_catalog(subject_texts, desc_texts, author_texts, publisher_texts, n_features=n_features)
+        return refit_from_counts(counts, slice(None))
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    texts = dict(zip(FIELDS, (subject_texts, desc_texts, author_texts, publisher_texts)))
+    vecs = {f: TfidfVectorizer() for f in FIELDS}
+    mats = {f: vecs[f].fit_transform(texts[f]) for f in FIELDS}
+    return FieldModels(vecs, mats)
+
+
+# =========================
+# 전체 카탈로그 카운트 행렬 → 필터된 행의 TF-IDF를 토큰화 없이 재계산
+# 해싱 모드: 어휘 사전 대신 토큰 해시 % n_features를 열 번호로 쓰는 HashingVectorizer로 카운트 —
+# 어휘 구축이 없고 메모리는 n_features로 고정, 질의 변환도 사전 조회 없이 해시만 계산한다.
+# IDF는 어휘 모드와 똑같이 카운트 행렬의 열별 문서빈도로 따로 누적한다(해시 충돌 열은 합쳐짐).
+# =========================
+def make_counter(n_features=None):
+    """n_features가 없으면 어휘 사전 CountVectorizer, 있으면 같은 토큰화의 HashingVectorizer(부호 없는 카운트)"""
+    from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+    if not n_features:
+        return CountVectorizer()
+    return HashingVectorizer(n_features=int(n_features), alternate_sign=False, norm=None)
+
+
+class CatalogCounts:
+    """전체 카탈로그를 한 번만 토큰화한 필드별 문서-단어 카운트(CSR)와 카운터(make_counter)"""
+    __slots__ = ("counters", "counts", "nbytes")
+
+    def __init__(self, counters, counts):
+        self.counters = counters
+        self.counts = counts
+        self.nbytes = (sum(sparse_nbytes(C) for C in counts.values())
+                       + sum(vocabulary_nbytes(c) for c in counters.values()))
+
+
+def count_catalog(subject_texts, desc_texts, author_texts, publisher_texts, n_features=None):
+    texts = dict(zip(FIELDS, (subject_texts, desc_texts, author_texts, publisher_texts)))
+    counters = {f: make_counter(n_features) for f in FIELDS}
+    counts = {f: counters[f].fit_transform(texts[f]).tocsr() for f in FIELDS}
+    return CatalogCounts(counters, counts)
+
+
+def index32(X):
+    """CSR/CSC의 indices/indptr를 int32로 (nnz·열 수가 int32 범위일 때만, 아니면 그대로)"""
+    if max(X.nnz, *X.shape) < 2**31 and (X.indices.dtype != np.int32 or X.indptr.dtype != np.int32):
+        X = type(X)((X.data, X.indices.astype(np.int32), X.indptr.astype(np.int32)), shape=X.shape)
+    return X
+
+
+def _tfidf_from_counts(C, idf, dtype=np.float64):
+    # TfidfTransformer.transform과 같은 순서: tf * idf → 행 L2 정규화 (idf 곱까지는 float64, 저장은 dtype)
+    from sklearn.preprocessing import normalize
+    X = C.astype(np.float64)
+    X.data *= idf[X.indices]
+    if dtype != np.float64:
+        X = index32(X.astype(dtype))
+    if X.shape[1] == 0:        # 가지치기로 남은 열이 없으면 빈 (n_rows, 0) 행렬 (normalize는 0열을 거부)
+        return X
+    return normalize(X, norm="l2", copy=False)
+
+
+def _select_columns(X, columns):
+    # X[:, columns] (columns 오름차순)와 같은 CSR — 열 번호 이진 탐색으로 O(nnz log k).
+    # scipy 열 인덱싱은 어휘/해시 차원 크기에 비례하는 비용이 들어 질의 한 줄에도 ms 단위
+    pos = np.searchsorted(columns, X.indices)
+    keep = columns[np.minimum(pos, len(columns) - 1)] == X.indices if len(columns) else np.zeros(X.nnz, dtype=bool)
+    indptr = np.concatenate([[0], np.cumsum(keep)])[X.indptr]
+    return type(X)((X.data[keep], pos[keep].astype(X.indices.dtype), indptr), shape=(X.shape[0], len(columns)))
+
+
+# =========================
+# 어휘 가지치기 — 필터된 행으로 재적합할 때 필드별로 열(단어)을 골라 낸다
+# TfidfVectorizer(min_df, max_df, max_features, stop_words)를 필터된 텍스트에 적합한 것과 같은 어휘.
+# 설정은 {"필드": {...}} JSON (또는 그 JSON 파일 경로), "*"는 모든 필드 기본값:
+#   {"*": {"min_df": 2}, "desc": {"min_df": 2, "max_df": 0.5, "max_features": 50000, "stop_words": ["및", "의"]}}
+# =========================
+class FieldPruning:
+    """min_df/max_df: 정수면 문서 수, 실수면 문서 비율 (필터된 행 기준), max_features: 말뭉치 빈도 상위 단어 수
+    (동점은 sklearn과 같게 정함, 해싱 모드는 버킷 번호 순),
+    stop_words: 뺄 단어 목록 또는 "english" — 카운터와 같은 토큰화로 열을 찾으므로 해싱 모드에서는 그 버킷을 뺀다"""
+    __slots__ = ("min_df", "max_df", "max_features", "stop_words")
+
+    def __init__(self, min_df=1, max_df=1.0, max_features=None, stop_words=()):
+        if isinstance(stop_words, str) and stop_words != "english":
+            raise ValueError(f"stop_words는 단어 목록 또는 \"english\": {stop_words!r}")
+        if max_features is not None and int(max_features) < 0:
+            raise ValueError(f"max_features는 0 이상: {max_features}")
+        self.min_df, self.max_df = min_df, max_df
+        self.max_features = None if max_features is None else int(max_features)
+        self.stop_words = stop_words if isinstance(stop_words, str) else tuple(stop_words)
+
+    def key(self):
+        return (self.min_df, self.max_df, self.max_features, self.stop_words)
+
+    def _stop_columns(self, counter):
+        words = self.stop_words
+        if words == "english":
+            from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+            words = sorted(ENGLISH_STOP_WORDS)
+        if not words:
+            return np.empty(0, dtype=np.int64)
+        return counter.transform([" ".join(words)]).tocsr().indices
+
+    def mask(self, counter, C, df):
+        """카운트 행렬 C(필터된 행)와 열별 문서빈도 df → 남길 열 마스크"""
+        n = C.shape[0]
+        lo = self.min_df if isinstance(self.min_df, (int, np.integer)) else self.min_df * n
+        hi = self.max_df if isinstance(self.max_df, (int, np.integer)) else self.max_df * n
+        keep = (df >= lo) & (df <= hi)
+        keep[self._stop_columns(counter)] = False
+        if self.max_features is not None and keep.sum() > self.max_features:
+            # 말뭉치 전체 빈도 상위 max_features개 — sklearn _limit_features와 같은 동점 처리:
+            # 남은 열을 단어 사전 순으로 놓고 int64 빈도에 기본 argsort (증분 추가로 열 순서가 섞여 있어도 같음).
+            # 해싱 모드는 단어가 없으므로 버킷 번호 순
+            tf = np.asarray(C.sum(axis=0), dtype=np.int64).ravel()
+            cols = np.flatnonzero(keep)
+            vocab = getattr(counter, "vocabulary_", None)
+            if vocab is not None:
+                terms = {j: t for t, j in vocab.items()}
+                cols = np.array(sorted(cols.tolist(), key=terms.__getitem__), dtype=np.int64)
+            top = cols[(-tf[cols]).argsort()[:self.max_features]]
+            keep[:] = False
+            keep[top] = True
+        return keep
+
+
+def parse_pruning(spec):
+    """가지치기 설정(None / dict / JSON 문자열 / JSON 파일 경로) → {필드: FieldPruning} (설정 없는 필드는 빠짐)"""
+    if not spec:
+        return {}
+    if isinstance(spec, str):
+        if os.path.exists(spec):
+            with open(spec, encoding="utf-8") as f:
+                spec = json.load(f)
+        else:
+            spec = json.loads(spec)
+    unknown = set(spec) - set(FIELDS) - {"*"}
+    if unknown:
+        raise ValueError(f"알 수 없는 필드: {', '.join(sorted(unknown))} (가능: *, {', '.join(FIELDS)})")
+    default = spec.get("*", {})
+    return {f: FieldPruning(**{**default, **spec.get(f, {})}) for f in FIELDS if f in spec or default}
+
+
+def pruning_key(pruning):
+    """모델 캐시 키용 — {필드: FieldPruning} → 정렬된 튜플"""
+    return tuple((f, pruning[f].key()) for f in FIELDS if f in (pruning or {}))
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _hash_bucket(token, n_features):
+    # FeatureHasher와 같은 버킷: |h| % n (h = -2^31이면 2^31 % n) — 자주 나오는 질의 단어는 해시를 다시 계산하지 않음
+    from sklearn.utils import murmurhash3_32
+    h = murmurhash3_32(token, seed=0)
+    return abs(h) % n_features if h != -2**31 else 2**31 % n_features
+
+
+class SlicedTfidf:
+    """필터된 행 기준으로 적합된 TfidfVectorizer와 동일하게 동작하는 질의 변환기
+
+    어휘는 전체 카탈로그 CountVectorizer를 공유하고, 필터된 행에 등장한 열(columns)과
+    그 idf만 따로 가진다. 어휘가 정렬되어 있으므로 열 순서도 재학습 결과와 같다.
+    해싱 모드에서는 counter가 HashingVectorizer이고 columns는 등장한 해시 버킷이다
+    (get_feature_names_out 없음).
+    """
+    __slots__ = ("counter", "columns", "idf_", "dtype", "_column_of")
+
+    def __init__(self, counter, columns, idf, dtype=np.float64):
+        self.counter = counter
+        self.columns = columns
+        self.idf_ = idf
+        self.dtype = dtype
+        self._column_of = None
+
+    @property
+    def nbytes(self):
+        return self.columns.nbytes + self.idf_.nbytes
+
+    def get_feature_names_out(self):
+        return self.counter.get_feature_names_out()[self.columns]
+
+    def transform(self, texts):
+        return _tfidf_from_counts(_select_columns(self.counter.transform(texts).tocsr(), self.columns), self.idf_,
+                                  self.dtype)
+
+    def _token_columns(self):
+        # 문서 → 카운터 열 번호 목록 (사전에 없는 단어는 뺌) — sklearn transform의 입력 검사·희소 행렬 생성 없이
+        analyze = self.counter.build_analyzer()
+        vocab = getattr(self.counter, "vocabulary_", None)
+        if vocab is not None:
+            return lambda text: [j for j in map(vocab.get, analyze(text)) if j is not None]
+        n = self.counter.n_features
+        return lambda text: [_hash_bucket(t, n) for t in analyze(text)]
+
+    def transform_one(self, text):
+        """문서 하나 → (열 번호, 값) — transform([text])의 행과 같은 값 (질의 하나에 쓰는 빠른 경로)
+
+        HashingVectorizer/CountVectorizer.transform과 normalize는 호출마다 입력 검사와 희소 행렬 생성에
+        수백 µs가 들어, 짧은 질의에서는 토큰화보다 비싸다. 여기서는 열 번호를 직접 세고
+        normalize(inplace_csr_row_normalize_l2)와 같은 순서로 L2 정규화한다.
+        """
+        if self._column_of is None:
+            self._column_of = self._token_columns()
+        col, cnt = np.unique(np.asarray(self._column_of(text), dtype=np.int64), return_counts=True)
+        pos = np.searchsorted(self.columns, col)
+        found = pos < len(self.columns)
+        found[found] = self.columns[pos[found]] == col[found]
+        pos = pos[found]
+        x = cnt[found].astype(np.float64) * self.idf_[pos]
+        if self.dtype != np.float64:
+            x = x.astype(self.dtype)
+        norm = 0.0
+        for sq in (x * x).tolist():      # sklearn과 같은 순서로 double에 누적
+            norm += sq
+        if norm:
+            x = (x.astype(np.float64) / math.sqrt(norm)).astype(x.dtype, copy=False)   # double로 나누고 dtype으로
+        return pos, x
+
+
+def slice_field(counter, C_full, rows, dtype=np.float64, pruning=None):
+    """rows(불리언 마스크/인덱스) 행만으로 TF-IDF 재적합 — 문서빈도는 열 합으로 다시 계산
+
+    pruning(FieldPruning)을 주면 남은 열만으로 (등장하지 않은 열과 함께 걸러 낸 뒤) idf를 계산한다.
+    """
+    C = C_full[rows]
+    n_samples = C.shape[0]
+    df = np.bincount(C.indices, minlength=C.shape[1])
+    keep = df > 0
+    if pruning is not None:
+        keep &= pruning.mask(counter, C, df)
+    columns = np.flatnonzero(keep)
+    # 등장하지 않은(또는 가지치기한) 열 제거: 정렬된 열 번호를 0..k-1로 재매핑 (O(nnz))
+    remap = np.zeros(C.shape[1], dtype=C.indices.dtype)
+    remap[columns] = np.arange(len(columns), dtype=C.indices.dtype)
+    if pruning is not None and len(columns) < np.count_nonzero(df):
+        entries = keep[C.indices]           # 가지치기한 열의 원소도 뺌
+        indptr = np.concatenate([[0], np.cumsum(entries)])[C.indptr].astype(C.indptr.dtype)
+        C = type(C)((C.data[entries], remap[C.indices[entries]], indptr), shape=(n_samples, len(columns)))
+    else:
+        C = type(C)((C.data, remap[C.indices], C.indptr), shape=(n_samples, len(columns)))
+    idf = np.log((n_samples + 1) / (df[columns].astype(np.float64) + 1)) + 1.0
+    return SlicedTfidf(counter, columns, idf, dtype), _tfidf_from_counts(C, idf, dtype)
+
+
+def refit_from_counts(catalog_counts, rows, dtype=np.float64, pruning=None):
+    """fit_field_models(필터된 텍스트)와 같은 결과를 카운트 행렬 슬라이스만으로 계산
+
+    dtype: 행렬 data 정밀도, pruning: {필드: FieldPruning} (parse_pruning) — 없는 필드는 가지치기 안 함
+    """
+    vecs, mats = {}, {}
+    for f in FIELDS:
+        vecs[f], mats[f] = slice_field(catalog_counts.counters[f], catalog_counts.counts[f], rows, dtype,
+                                       (pruning or {}).get(f))
+    return FieldModels(vecs, mats)
+
+
+class ModelCache:
+    """LRU 모델 캐시 — 항목 추정 메모리 합이 budget_bytes를 넘으면 오래된 것부터 제거
+
+    가장 최근 항목 하나는 예산을 넘더라도 유지한다(방금 학습한 모델을 바로 버리지 않도록).
+    항목 크기는 m.nbytes를 그때그때 읽으므로, 저장 뒤에 항목이 커지면(엔진에 이웃 그래프/ANN 색인을 붙임)
+    resize(key)를 불러 예산을 다시 맞춘다.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = int(budget_bytes)
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(m.nbytes for m in self._items.values())
+
+    def __len__(self):
+        return len(self._items)
+
+    def sizes(self):
+        """(키, 추정 바이트) 목록 — 오래된 것부터 (진단 표시용)"""
+        with self._lock:
+            return [(k, m.nbytes) for k, m in self._items.items()]
+
+    def get(self, key):
+        with self._lock:
+            m = self._items.get(key)
+            if m is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+            return m
+
+    def put(self, key, models):
+        with self._lock:
+            self._items[key] = models
+            self._items.move_to_end(key)
+            self._evict()
+
+    def resize(self, key):
+        """key 항목이 커진 뒤 호출 — 크기를 다시 재고 예산을 넘으면 오래된 것부터 제거 (key는 최근 사용으로)"""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self._evict()
+
+    def _evict(self):
+        total = sum(m.nbytes for m in self._items.values())
+        while total > self.budget_bytes and len(self._items) > 1:
+            _, old = self._items.popitem(last=False)
+            total -= old.nbytes
+
+    def get_or_fit(self, key, fit):
+        """캐시에 있으면 재사용, 없으면 fit()으로 학습해 저장 (학습은 락 밖에서 수행)"""
+        m = self.get(key)
+        if m is not None:
+            return m
+        with self._lock:
+            self.misses += 1
+        m = fit()
+        self.put(key, m)
+        return m
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
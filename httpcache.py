@@ -0,0 +1,98 @@
+"""원격 카탈로그 URL용 디스크 HTTP 캐시
+
+본문은 디스크에 저장하고 ETag/Last-Modified를 함께 기록한다.
+  - 마지막 확인 후 ttl초 이내: 네트워크 없이 디스크 본문 사용
+  - ttl이 지나면: If-None-Match / If-Modified-Since 조건부 요청 → 304면 디스크 본문 재사용
+  - 원본 서버에 연결할 수 없거나 5xx: 디스크 본문이 있으면 그대로 사용(stale)
+"""
+import os, json, time, hashlib, tempfile
+
+CHUNK = 1 << 20
+
+
+class CachedBody:
+    """캐시된 응답 본문 파일과 메타데이터 — status: "fresh"(TTL 이내) / "revalidated"(304) /
+    "downloaded"(200) / "stale"(원본 연결 실패로 디스크 본문 사용)"""
+    __slots__ = ("path", "sha256", "etag", "last_modified", "fetched_at", "status")
+
+    def __init__(self, path, meta, status):
+        self.path = path
+        self.sha256 = meta["sha256"]
+        self.etag = meta.get("etag")
+        self.last_modified = meta.get("last_modified")
+        self.fetched_at = meta["fetched_at"]
+        self.status = status
+
+
+class HttpCache:
+    def __init__(self, directory, ttl=300):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + ".body", base + ".json"
+
+    def _read_meta(self, meta_path, body_path):
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if os.path.exists(body_path) else None
+
+    def _write_meta(self, meta_path, meta):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".json.tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, meta_path)
+
+    def fetch(self, url, timeout=20):
+        """url 본문을 디스크에 확보하고 CachedBody를 반환 (본문이 없고 원본도 실패하면 예외)"""
+        body_path, meta_path = self._paths(url)
+        meta = self._read_meta(meta_path, body_path)
+        now = time.time()
+        if meta is not None and now - meta["fetched_at"] < self.ttl:
+            return CachedBody(body_path, meta, "fresh")
+
+        import requests             # 지연 import — TTL 이내 적중은 requests 없이 (기동 시간)
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"): headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"): headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            r = requests.get(url, headers=headers, timeout=timeout, stream=True)
+        except requests.RequestException:
+            if meta is None: raise
+            return CachedBody(body_path, meta, "stale")
+
+        with r:
+            if r.status_code == 304 and meta is not None:
+                meta["fetched_at"] = now
+                self._write_meta(meta_path, meta)
+                return CachedBody(body_path, meta, "revalidated")
+            if r.status_code >= 500 and meta is not None:
+                return CachedBody(body_path, meta, "stale")
+            r.raise_for_status()
+            # 임시 파일에 받아 교체 — 받는 도중 실패해도 이전 본문은 그대로 남는다
+            sha = hashlib.sha256()
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".body.tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    for chunk in r.iter_content(CHUNK):
+                        sha.update(chunk)
+                        f.write(chunk)
+            except requests.RequestException:
+                os.unlink(tmp)
+                if meta is None: raise
+                return CachedBody(body_path, meta, "stale")
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            os.replace(tmp, body_path)
+            meta = {"url": url, "sha256": sha.hexdigest(), "fetched_at": now,
+                    "etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+            self._write_meta(meta_path, meta)
+            return CachedBody(body_path, meta, "downloaded")
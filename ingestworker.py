@@ -0,0 +1,57 @@
+"""병렬 수집 도우미 프로세스 — catalog.parallel_catalog가 `python ingestworker.py WORKERS`로 띄운다
+
+프로세스 풀은 이 도우미 안에서만 만든다. spawn 자식은 부모의 __main__을 다시 import하는데,
+Streamlit 서버 안에서 풀을 바로 열면 그 __main__이 페이지 스크립트라 자식마다 페이지 전체가 돈다.
+여기서는 __main__이 이 파일(아래 __main__ 가드)이므로 자식은 함수 정의만 읽는다.
+
+표준 입력/출력으로 길이(8바이트) + pickle 프레임을 주고받는다:
+  입력: 원문 묶음(JSON Lines bytes/str)을 차례로, EOF로 끝
+  출력: 묶음마다 (True, 부분 Catalog)를 입력 순서대로 — 실패하면 (False, 예외) 하나를 쓰고 끝
+"""
+import pickle, struct, sys
+from collections import deque
+
+_HEAD = struct.Struct("<Q")
+
+
+def write_frame(fp, obj):
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    fp.write(_HEAD.pack(len(data)))
+    fp.write(data)
+    fp.flush()
+
+
+def read_frame(fp):
+    """다음 프레임의 객체 — EOF면 None"""
+    head = fp.read(_HEAD.size)
+    if len(head) < _HEAD.size:
+        return None
+    return pickle.loads(fp.read(_HEAD.unpack(head)[0]))
+
+
+def catalog_from_batch(block):
+    import io
+    from catalog import stream_catalog
+    fp = io.BytesIO(block) if isinstance(block, bytes) else io.StringIO(block)
+    return stream_catalog(fp, jsonl=True)
+
+
+def serve(workers, inp, out):
+    """inp의 묶음을 workers개 프로세스에 나눠 처리 — 처리 중인 묶음은 2·workers개까지"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    pending = deque()
+    try:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as ex:
+            while (block := read_frame(inp)) is not None:
+                pending.append(ex.submit(catalog_from_batch, block))
+                if len(pending) >= 2 * workers:
+                    write_frame(out, (True, pending.popleft().result()))
+            while pending:
+                write_frame(out, (True, pending.popleft().result()))
+    except Exception as e:
+        write_frame(out, (False, e))
+
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]), sys.stdin.buffer, sys.stdout.buffer)
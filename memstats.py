@@ -0,0 +1,121 @@
+"""메모리 사용량 집계 — 카탈로그 열, 카운트 색인·어휘 사전, 필드별 TF-IDF 행렬, 모델 캐시, 세션 상태
+
+항목은 dict 행 목록으로 모은다:
+  component(구성 요소), part(세부), bytes, 그리고 해당하면 nnz / data_bytes / index_bytes(indices+indptr) / entries
+바이트는 numpy/scipy 버퍼 크기 + 파이썬 객체(sys.getsizeof) 추정이라 RSS와 정확히 같지는 않다.
+어휘 사전은 색인의 카운터가 가지고, 필터별 모델(SlicedTfidf)은 열 번호와 idf만 가지므로 따로 센다.
+"""
+import os, sys
+
+import numpy as np
+
+from features import FIELDS, sparse_nbytes, vocabulary_nbytes
+
+MIB = 2**20
+
+
+def process_rss():
+    """현재 프로세스 상주 메모리(바이트) — /proc가 없으면 최대 RSS(getrusage), 둘 다 안 되면 None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024     # macOS는 바이트, Linux는 KiB
+    except (ImportError, OSError):
+        return None
+
+
+def _is_sparse(x):
+    return all(hasattr(x, a) for a in ("data", "indices", "indptr", "nnz"))
+
+
+def deep_sizeof(obj, _seen=None):
+    """객체가 붙잡고 있는 대략적인 바이트 — 배열/희소 행렬 버퍼, nbytes 속성, 컨테이너는 재귀 (같은 객체는 한 번)"""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes if obj.base is None else 0          # 뷰는 원본이 셈
+    if _is_sparse(obj):
+        return sparse_nbytes(obj)
+    n = getattr(obj, "nbytes", None)
+    if isinstance(n, (int, np.integer)) and not isinstance(obj, (str, bytes)):
+        return int(n)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(x, seen) for x in obj)
+    return size
+
+
+def sparse_row(component, part, X):
+    index = X.indices.nbytes + X.indptr.nbytes
+    return {"component": component, "part": f"{part} ({X.shape[0]:,}×{X.shape[1]:,}, {X.dtype})",
+            "bytes": X.data.nbytes + index, "nnz": int(X.nnz), "data_bytes": X.data.nbytes, "index_bytes": index}
+
+
+def catalog_rows(catalog, component="카탈로그"):
+    """열별 바이트 — 문자열 열은 버퍼+오프셋, 코드 열은 코드+고유값 목록(entries=고유값 수)"""
+    rows = [{"component": component, "part": "title (text)", "bytes": catalog.title.nbytes},
+            {"component": component, "part": "desc (text)", "bytes": catalog.desc.nbytes}]
+    for name in ("subjects", "creator", "publisher"):
+        col = getattr(catalog, name)
+        rows.append({"component": component, "part": f"{name} (codes)", "bytes": col.nbytes,
+                     "entries": len(col.categories)})
+    arrays = (catalog.year, catalog.has_year, catalog.pages, catalog.has_pages)
+    rows.append({"component": component, "part": "year/pages (arrays)", "bytes": sum(a.nbytes for a in arrays)})
+    return rows
+
+
+def counts_rows(counts, component="카운트 색인"):
+    """필드별 카운트 행렬(nnz, data/index 바이트)과 어휘 사전(단어 수, 추정 바이트)"""
+    rows = []
+    for f in FIELDS:
+        rows.append(sparse_row(component, f"{f} counts", counts.counts[f]))
+        vocab = getattr(counts.counters[f], "vocabulary_", None)
+        if vocab is not None:
+            rows.append({"component": component, "part": f"{f} vocabulary", "bytes": vocabulary_nbytes(counts.counters[f]),
+                         "entries": len(vocab)})
+    return rows
+
+
+def engine_rows(engine, component="추천 모델"):
+    """필드별 TF-IDF 행렬 + 질의 변환기(열 번호/idf), 쌓은 행렬, 이웃 그래프, ANN 색인"""
+    rows = []
+    for f in FIELDS:
+        rows.append(sparse_row(component, f"{f} tf-idf", engine.models.matrices[f]))
+        vec = engine.models.vectorizers[f]
+        n = getattr(vec, "nbytes", None)
+        rows.append({"component": component, "part": f"{f} columns/idf",
+                     "bytes": n if n is not None else vocabulary_nbytes(vec), "entries": len(vec.idf_)})
+    rows.append(sparse_row(component, "stacked", engine.stacked))
+    for name, x in (("neighbor graph", engine.neighbors), ("ann index", engine.ann)):
+        if x is not None:
+            rows.append({"component": component, "part": name, "bytes": x.nbytes})
+    return rows
+
+
+def session_rows(state, component="세션 상태"):
+    """session_state(또는 dict) 키별 추정 바이트, 큰 것부터"""
+    rows = [{"component": component, "part": str(k), "bytes": deep_sizeof(v)} for k, v in dict(state).items()]
+    return sorted(rows, key=lambda r: -r["bytes"])
+
+
+def total_bytes(rows):
+    return sum(r["bytes"] for r in rows)
+
+
+def budget_warnings(usage, budgets):
+    """usage / budgets: 이름 → 바이트 (budget이 0/None이면 검사 안 함) → 초과한 항목의 경고 문자열 목록"""
+    out = []
+    for name, used in usage.items():
+        limit = budgets.get(name)
+        if limit and used is not None and used > limit:
+            out.append(f"{name}: {used / MIB:,.1f} MiB > 예산 {limit / MIB:,.0f} MiB")
+    return out
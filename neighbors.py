@@ -0,0 +1,134 @@
+"""책 선택형 추천용 필드별 top-K 이웃 그래프
+
+필드마다 각 도서의 상위 K개 이웃(코사인 유사도 > 0)과 점수를 미리 계산해 두고,
+추천 시에는 네 이웃 목록의 합집합만 현재 가중치·최근성으로 재채점한다.
+후보가 추천 개수보다 적을 때만 전수 계산으로 돌아간다.
+
+exact=True면 결과가 전수 계산과 같음을 보장한다: 목록 밖 도서의 필드 유사도는
+(K+1)번째 점수(thresholds) 이하이므로, 후보 중 k번째 최종 점수가 이 상한보다 클 때만
+후보 결과를 쓰고 아니면 전수 계산한다.
+"""
+import threading
+
+import numpy as np
+
+from features import FIELDS
+from scoring import top_k
+
+
+TIE_EPS = 1e-9
+
+
+class NeighborGraph:
+    """indices/scores: (필드 수, N, K) — 빈 칸은 -1 / 0, thresholds: (N, 필드 수) 상한"""
+    __slots__ = ("k", "indices", "scores", "thresholds")
+
+    def __init__(self, k, indices, scores, thresholds):
+        self.k = k
+        self.indices = indices
+        self.scores = scores
+        self.thresholds = thresholds
+
+    @property
+    def nbytes(self):
+        return self.indices.nbytes + self.scores.nbytes + self.thresholds.nbytes
+
+
+def _field_neighbors(X, k, block_cells, tie_break, indices, scores, thresholds):
+    # X (N×V, L2 정규화 CSR) 의 행 블록마다 X[b] · Xᵀ → 밀집 (b×N) 으로 행별 상위 k+1 부분 선택
+    # 설명/저자처럼 흔한 토큰이 있는 필드는 곱 결과가 사실상 밀집이라 희소 정렬보다 빠르다
+    # 동점(같은 출판사·주제 묶음 등)은 tie_break(0~1, 예: 최근성)가 큰 도서를 우선 — 순위 키에
+    # TIE_EPS 배만 더하므로 실제 점수 s ≤ 키 ≤ (k+1)번째 키, 즉 thresholds는 여전히 상한이다
+    n = X.shape[0]
+    Xt = X.T.tocsr()
+    block = max(1, block_cells // max(n, 1))
+    kk = min(k + 1, n)
+    for b0 in range(0, n, block):
+        D = (X[b0:b0 + block] @ Xt).toarray()
+        b = D.shape[0]
+        D[np.arange(b), np.arange(b0, b0 + b)] = 0.0   # 자기 자신 제외
+        key = D + TIE_EPS * tie_break if tie_break is not None else D
+        if kk < n:
+            part = np.argpartition(-key, kk - 1, axis=1)[:, :kk]
+        else:
+            part = np.tile(np.arange(n), (b, 1))
+        keys = np.take_along_axis(key, part, axis=1)
+        order = np.lexsort((part, -keys))           # 행별 키 내림차순, 그래도 같으면 작은 인덱스
+        part = np.take_along_axis(part, order, axis=1)
+        keys = np.take_along_axis(keys, order, axis=1)
+        top_i = part[:, :k]
+        top_v = np.take_along_axis(D, top_i, axis=1)
+        m = top_i.shape[1]
+        indices[b0:b0 + b, :m] = np.where(top_v > 0, top_i, -1)
+        scores[b0:b0 + b, :m] = np.where(top_v > 0, top_v, 0.0)
+        # 목록 밖 도서의 점수 상한 = (k+1)번째 키
+        thresholds[b0:b0 + b] = np.maximum(keys[:, k], 0.0) if keys.shape[1] > k else 0.0
+
+
+def build_neighbor_graph(engine, k=20, tie_break=None, block_cells=2**24):
+    """engine의 네 필드 행렬로 이웃 그래프를 만든다 (오프라인/백그라운드용, O(N²) 블록 곱)
+
+    tie_break: 같은 점수의 이웃 중 우선할 도서 (길이 N, 0~1 — 보통 최근성 가중치)
+    block_cells: 블록당 밀집 점수 행렬 크기(행 수 × N) 상한 — 기본 16M 셀(128MB)
+    """
+    n = engine.n_items
+    indices = np.full((len(FIELDS), n, k), -1, dtype=np.int32)
+    scores = np.zeros((len(FIELDS), n, k), dtype=np.float32)
+    thresholds = np.zeros((n, len(FIELDS)), dtype=np.float64)
+    for fi, f in enumerate(FIELDS):
+        _field_neighbors(engine.models.matrices[f], k, block_cells, tie_break, indices[fi], scores[fi], thresholds[:, fi])
+    return NeighborGraph(k, indices, scores, thresholds)
+
+
+_job_lock = threading.Lock()
+
+
+def ensure_neighbor_graph(engine, k=20, tie_break=None, background=True, on_built=None):
+    """engine.neighbors가 없으면 빌드 — background면 데몬 스레드로 한 번만 시작하고 완료 전엔 None
+
+    on_built: 그래프를 붙인 뒤 부를 함수 (예: 엔진이 커졌으니 ModelCache.resize)
+    """
+    with _job_lock:
+        if engine.neighbors is not None or engine._neighbor_job is not None:
+            return engine.neighbors
+
+        def run():
+            engine.neighbors = build_neighbor_graph(engine, k=k, tie_break=tie_break)
+            if on_built is not None:
+                on_built()
+
+        if not background:
+            run()
+            return engine.neighbors
+        engine._neighbor_job = threading.Thread(target=run, name="neighbor-graph", daemon=True)
+        engine._neighbor_job.start()
+        return None
+
+
+def similar_items(engine, idx, weights, recency, w_recency, k, exact=True):
+    """기준 도서 idx와 비슷한 상위 k권 → (인덱스, 콘텐츠 점수, 최종 점수)
+
+    이웃 그래프가 있으면 이웃 목록 합집합만 재채점하고, 그래프가 없거나 후보가 부족하면
+    (exact=True면 후보만으로 전수 계산 결과를 보장할 수 없을 때도) 전수 계산한다.
+    exact=False는 상한 확인 없이 후보 결과를 쓰는 근사 — 더 빠르지만 결과가 전수 계산과 다를 수 있어 명시적으로만.
+    float16 채점(engine.half)이면 그래프의 임계값(필드 행렬 기준)이 채점 값의 상한이 아니므로 exact=True면 전수 계산.
+    """
+    w = np.asarray(weights, dtype=np.float64)
+    graph = engine.neighbors
+    if graph is not None and k <= graph.k and not (exact and engine.half):
+        lists = [graph.indices[fi, idx] for fi in range(len(FIELDS)) if w[fi] > 0]
+        cands = np.unique(np.concatenate(lists)) if lists else np.empty(0, dtype=np.int32)
+        cands = cands[cands >= 0]
+        if len(cands) >= k:
+            content = engine.score_item_rows(idx, cands, w)
+            final = (1 - w_recency) * content + w_recency * recency[cands]
+            top = top_k(final, k)
+            if not exact:
+                return cands[top], content[top], final[top]
+            bound = (1 - w_recency) * float(w @ graph.thresholds[idx]) + w_recency * float(recency.max())
+            if final[top[-1]] > bound:
+                return cands[top], content[top], final[top]
+    content = engine.score_item(idx, w)
+    final = (1 - w_recency) * content + w_recency * recency
+    top = top_k(final, k, exclude=[idx])
+    return top, content[top], final[top]
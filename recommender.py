@@ -0,0 +1,271 @@
+"""Streamlit 없이 쓰는 추천 엔진 — 카탈로그 로드, 색인/모델, 필터, 책/키워드 추천
+
+verify.py(Streamlit 페이지)와 cli.py(배치 작업/명령줄)가 함께 쓴다.
+  - load_catalog: 파일 경로 또는 http(s) URL → (내용 해시, Catalog)
+  - Recommender: 카탈로그 색인(CatalogIndex) + 모델 캐시 — 필터별 RecommenderView를 만든다
+  - RecommenderView: 필터를 통과한 행들로 적합한 ScoringEngine과 최근성 가중치 —
+    제목 검색, 책 선택형/키워드형 추천(한 건 또는 일괄)
+View 안의 위치(pos)는 필터된 목록 안의 순번이고, catalog 행 번호는 view.rows[pos]이다.
+"""
+import datetime, hashlib, pickle, threading
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from catalog import is_jsonl_name, stream_catalog_file, stream_catalog_url
+from catalogindex import CatalogIndex
+from features import ModelCache, field_dtype, parse_pruning, pruning_key, refit_from_counts
+from scoring import ScoringEngine, top_k
+from neighbors import ensure_neighbor_graph, similar_items
+from ann import ann_query_items, ann_similar_items, ensure_ann_index
+from titleindex import build_title_index
+from batch import recommend_items, recommend_queries
+
+DEFAULT_WEIGHTS = (0.45, 0.30, 0.15, 0.10)     # 주제/설명/저자/출판사 (features.FIELDS 순서)
+DEFAULT_W_RECENCY = 0.30
+INDEX_FORMAT = 1                               # save()/load() 파일 형식 버전
+
+
+def normalize_weights(weights):
+    """필드 가중치 합을 1로 — 모두 0이면 기본값"""
+    w = [float(x) for x in weights]
+    s = sum(w)
+    return tuple(x / s for x in w) if s > 0 else DEFAULT_WEIGHTS
+
+
+def recency_weights(years, has_year, now_year=None):
+    """최근 5년 선형 가중치 (올해=1.0 … 5년 이상=0, 연도 없음=0) — 연도 열 전체에 대해"""
+    if now_year is None: now_year = datetime.date.today().year
+    d = np.maximum(now_year - years, 0)
+    return np.where(has_year & (d <= 5), (5 - d) / 5.0, 0.0)
+
+
+def pick_related_keywords(subjects, picked_keywords=None, top_n=3):
+    subs = [s for s in subjects if s]
+    if not subs: return []
+    picked_set = set([k.strip() for k in (picked_keywords or []) if k.strip()])
+    inter = [s for s in subs if s in picked_set]
+    result = inter[:top_n]
+    if len(result) < top_n:
+        for s in subs:
+            if s not in result:
+                result.append(s)
+            if len(result) >= top_n:
+                break
+    return result[:top_n]
+
+
+def is_url(source):
+    return source.startswith(("http://", "https://"))
+
+
+def load_catalog(source, jsonl=None, workers=1, http_cache=None, timeout=20):
+    """파일 경로 또는 http(s) URL → (내용 해시, Catalog)
+
+    http_cache(httpcache.HttpCache)를 주면 URL 본문을 디스크 캐시에 받아 파일처럼 읽는다.
+    """
+    if not is_url(source):
+        return stream_catalog_file(source, jsonl, workers=workers)
+    if http_cache is None:
+        return stream_catalog_url(source, timeout=timeout, jsonl=jsonl)
+    body = http_cache.fetch(source, timeout=timeout)
+    if jsonl is None: jsonl = is_jsonl_name(urlsplit(source).path)
+    return stream_catalog_file(body.path, jsonl, workers=workers)
+
+
+class Recommender:
+    """카탈로그 색인 + 필터별 모델 캐시 (세션/작업 간 공유 가능, 스레드 안전)
+
+    neighbor_k > 0이면 view()가 책 선택형 추천용 이웃 그래프를 (neighbor_background면 백그라운드로) 빌드한다.
+    neighbor_exact(기본)면 이웃 그래프를 써도 전수 계산과 같은 결과 — False는 근사 병합(opt-in).
+    matrix_dtype="float16"이고 neighbor_exact면 그래프 임계값이 채점 값의 상한이 아니므로 그래프를 만들지 않는다.
+    matrix_dtype: view 모델의 행렬 정밀도 (features.MATRIX_DTYPES — "float32"/"float16"은 메모리 약 절반/그 이하)
+    pruning: 필드별 어휘 가지치기 설정 (features.parse_pruning이 받는 dict / JSON 문자열 / 파일 경로)
+    """
+
+    def __init__(self, digest, index, n_features=0, model_cache=None, neighbor_k=0,
+                 neighbor_max_items=50_000, neighbor_background=True, neighbor_exact=True, matrix_dtype="float64",
+                 pruning=None):
+        field_dtype(matrix_dtype)              # 잘못된 이름이면 여기서 ValueError
+        self.digest = digest
+        self.index = index
+        self.n_features = n_features
+        self.matrix_dtype = matrix_dtype
+        self.pruning = parse_pruning(pruning)
+        self.model_cache = model_cache if model_cache is not None else ModelCache(512 * 2**20)
+        self.neighbor_k = neighbor_k
+        self.neighbor_max_items = neighbor_max_items
+        self.neighbor_background = neighbor_background
+        self.neighbor_exact = neighbor_exact
+        self._title_index = (None, None)       # (세대, TitleIndex)
+        self._lock = threading.RLock()
+
+    @classmethod
+    def build(cls, digest, catalog, n_features=0, **kwargs):
+        """Catalog 전체를 한 번 토큰화해 카운트 색인을 만든다"""
+        return cls(digest, CatalogIndex.build(catalog, n_features=n_features or None), n_features, **kwargs)
+
+    @classmethod
+    def from_source(cls, source, jsonl=None, workers=1, http_cache=None, n_features=0, **kwargs):
+        return cls.build(*load_catalog(source, jsonl, workers, http_cache), n_features=n_features, **kwargs)
+
+    def save(self, path):
+        """색인(카탈로그 + 카운트 행렬 + live + 반영한 추가분 key)을 파일로 — load()로 토큰화 없이 복원"""
+        with self._lock:
+            generation, catalog, counts, live = self.index.snapshot()
+            applied = set(self.index.applied)
+        state = {"format": INDEX_FORMAT, "digest": self.digest, "n_features": self.n_features,
+                 "generation": generation, "catalog": catalog, "counts": counts, "live": live, "applied": applied}
+        with open(path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.get("format") != INDEX_FORMAT:
+            raise ValueError(f"지원하지 않는 색인 파일 형식: {state.get('format')}")
+        index = CatalogIndex(state["catalog"], state["counts"])
+        index.live = state["live"]
+        index.generation = state["generation"]
+        index.applied = set(state.get("applied", ()))      # 이 키가 없던 옛 파일은 빈 집합
+        return cls(state["digest"], index, state["n_features"], **kwargs)
+
+    @property
+    def catalog(self):
+        return self.index.snapshot()[1]
+
+    def add_books(self, books, key=None):
+        """신규 도서 증분 반영 → (새 도서 행 번호, 압축했으면 옛 행 → 새 행 배열 아니면 None)
+
+        key(예: 파일 해시)가 이미 반영된 것이면 건너뛰고 None. 반영 뒤 압축이 일어나면 행 번호가 바뀌므로
+        옛 행 번호(또는 뷰 위치)를 들고 있는 쪽은 두 번째 값으로 옮기거나 버려야 한다.
+        """
+        with self._lock:
+            if key is not None and key in self.index.applied:
+                return None
+            rows = self.index.add_books(books)
+            if key is not None:
+                self.index.applied.add(key)
+            remap = self.index.maybe_compact()
+            return (rows if remap is None else remap[rows]), remap
+
+    def update_books(self, rows, books):
+        """rows 행을 books로 교체(옛 행은 삭제 표시, 새 버전은 끝에 추가) → add_books와 같은 (새 행 번호, 압축 배열)"""
+        with self._lock:
+            new_rows = self.index.update_books(rows, books)
+            remap = self.index.maybe_compact()
+            return (new_rows if remap is None else remap[new_rows]), remap
+
+    def remove_books(self, rows):
+        """rows 행 삭제 → 압축했으면 옛 행 → 새 행 배열(삭제된 행은 -1), 아니면 None"""
+        with self._lock:
+            self.index.remove(rows)
+            return self.index.maybe_compact()
+
+    def title_index(self):
+        """현재 세대 카탈로그 제목의 bigram 역색인 (세대가 바뀌면 다시 빌드)"""
+        generation, catalog, _, _ = self.index.snapshot()
+        with self._lock:
+            g, ti = self._title_index
+            if g != generation:
+                ti = build_title_index(catalog.title)
+                self._title_index = (generation, ti)
+            return ti
+
+    def page_mask(self, page_range=None, include_no_pages=True):
+        """쪽수 범위 필터 ∧ live — page_range가 None이면 live 전체"""
+        _, catalog, _, live = self.index.snapshot()
+        if page_range is None:
+            return live.copy()
+        lo, hi = page_range
+        return np.where(catalog.has_pages, (catalog.pages >= lo) & (catalog.pages <= hi),
+                        include_no_pages) & live
+
+    def view(self, mask=None, now_year=None):
+        """mask(기본: live 전체) 행들로 적합한 RecommenderView — 같은 행 집합이면 모델 캐시 재사용"""
+        generation, catalog, counts, live = self.index.snapshot()
+        mask = live if mask is None else np.asarray(mask, dtype=bool) & live
+        rows = np.flatnonzero(mask)
+        # 캐시 키: 데이터셋 내용 해시 + 증분 세대 + 필터를 통과한 행 집합 (가중치/Top N 변경 시 재학습 없음)
+        rowset_digest = hashlib.sha256(np.packbits(mask).tobytes()).hexdigest()
+        key = (self.digest, generation, len(catalog), rowset_digest, self.n_features, self.matrix_dtype,
+               pruning_key(self.pruning))
+        engine = self.model_cache.get_or_fit(key, lambda: ScoringEngine(
+            refit_from_counts(counts, mask, field_dtype(self.matrix_dtype), self.pruning),
+            half=self.matrix_dtype == "float16"))
+        recency = recency_weights(catalog.year[rows], catalog.has_year[rows], now_year)
+        use_graph = not (engine.half and self.neighbor_exact)     # float16 + exact면 similar_items가 그래프를 안 씀
+        if self.neighbor_k and use_graph and 0 < engine.n_items <= self.neighbor_max_items:
+            ensure_neighbor_graph(engine, k=self.neighbor_k, tie_break=recency, background=self.neighbor_background,
+                                  on_built=lambda: self.model_cache.resize(key))
+        return RecommenderView(self, generation, catalog, mask, rows, engine, recency, key)
+
+
+class RecommenderView:
+    """필터된 행 집합 하나에 대한 추천 — 결과는 (위치, 콘텐츠 점수, 최종 점수) 배열"""
+    __slots__ = ("recommender", "generation", "catalog", "mask", "rows", "engine", "recency", "model_key")
+
+    def __init__(self, recommender, generation, catalog, mask, rows, engine, recency, model_key=None):
+        self.recommender = recommender
+        self.generation = generation       # catalog의 색인 세대 (행 번호가 가리키는 도서가 같은 범위)
+        self.catalog = catalog
+        self.mask = mask
+        self.rows = rows
+        self.engine = engine
+        self.recency = recency
+        self.model_key = model_key         # recommender.model_cache에서 engine의 키 (ANN을 붙인 뒤 resize용)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def top_subjects(self, n=10):
+        return self.catalog.top_subjects(self.mask, n=n)
+
+    def search_titles(self, query):
+        """제목에 query가 부분 문자열로 들어 있는 도서의 위치 (오름차순)"""
+        hits = self.recommender.title_index().search(query, self.catalog.title)
+        return np.searchsorted(self.rows, hits[self.mask[hits]])
+
+    def ensure_ann(self):
+        cache, key = self.recommender.model_cache, self.model_key
+        return ensure_ann_index(self.engine, on_built=lambda: cache.resize(key))
+
+    def recommend_by_book(self, pos, weights=DEFAULT_WEIGHTS, w_recency=DEFAULT_W_RECENCY, k=5, nprobe=None):
+        """위치 pos 도서와 비슷한 상위 k권 — nprobe를 주면 ANN 후보 + 정확 재채점"""
+        if nprobe is not None:
+            self.ensure_ann()
+            return ann_similar_items(self.engine, pos, weights, self.recency, w_recency, k, nprobe=nprobe)
+        return similar_items(self.engine, pos, weights, self.recency, w_recency, k,
+                             exact=self.recommender.neighbor_exact)
+
+    def recommend_by_keywords(self, query, weights=DEFAULT_WEIGHTS, w_recency=DEFAULT_W_RECENCY, k=5, nprobe=None):
+        """키워드 질의 상위 k권 — nprobe를 주면 ANN 후보 + 정확 재채점"""
+        if nprobe is not None:
+            self.ensure_ann()
+            return ann_query_items(self.engine, query, weights, self.recency, w_recency, k, nprobe=nprobe)
+        content = self.engine.score_query(query, weights)
+        final = (1 - w_recency) * content + w_recency * self.recency
+        order = top_k(final, k)
+        return order, content[order], final[order]
+
+    def recommend_books_batch(self, positions, weights=DEFAULT_WEIGHTS, w_recency=DEFAULT_W_RECENCY, k=5):
+        """여러 기준 도서 일괄 — (위치, 콘텐츠, 최종) 각 (len(positions)×k), 빈 칸은 -1 / nan"""
+        return recommend_items(self.engine, positions, weights, self.recency, w_recency, k)
+
+    def recommend_keywords_batch(self, queries, weights=DEFAULT_WEIGHTS, w_recency=DEFAULT_W_RECENCY, k=5):
+        """여러 키워드 질의 일괄 — (위치, 콘텐츠, 최종) 각 (len(queries)×k), 빈 칸은 -1 / nan"""
+        return recommend_queries(self.engine, queries, weights, self.recency, w_recency, k)
+
+    def results(self, positions, content, final, picked_keywords=None, n_keywords=3):
+        """추천 결과 → 표시/출력용 dict 목록 (catalog.record + 행 번호, 점수, 관련 키워드)"""
+        out = []
+        for i, c, f in zip(positions, content, final):
+            if i < 0:
+                continue
+            row = int(self.rows[i])
+            r = self.catalog.record(row)
+            r.update(row=row, content_score=float(c), final_score=float(f),
+                     keywords=pick_related_keywords(r["subjects"], picked_keywords, n_keywords))
+            out.append(r)
+        return out
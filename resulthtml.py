@@ -0,0 +1,80 @@
+"""추천 결과 목록 HTML — 결과 전체를 요소 하나로 (책마다 st.markdown 두 번 → 목록 전체에 한 번)
+
+책 한 줄(제목/저자/연도/쪽수)은 (데이터셋 해시, 색인 세대, 행) 키로, 키워드 칩 줄은 키워드 튜플 키로
+프로세스 공용 LRU(FragmentCache)에 렌더링해 두고 재사용한다. 점수 부분만 요청마다 새로 만든다.
+텍스트 값은 HTML 이스케이프한다.
+"""
+import html, threading
+from collections import OrderedDict
+
+RESULT_LIST_CSS = """
+.rec-list { margin: 0 0 .5rem 0; padding-left: 1.2rem; }
+.rec-list li { margin: .25rem 0 0 0; }
+.keyword-row { margin: .25rem 0 .5rem 0; }
+.keyword-chip {
+  display:inline-block; padding: 4px 10px; margin: 3px 8px 3px 0;
+  background:#fecdd3; color:#7a1330; border-radius:8px; font-size:0.85rem;
+  line-height:1.2; font-weight:700; border:1px solid #fda4af;
+}
+"""
+
+
+class FragmentCache:
+    """키 → 렌더링된 HTML 조각 LRU (최대 maxsize개, 스레드 안전)"""
+    __slots__ = ("maxsize", "_items", "_lock", "hits", "misses")
+
+    def __init__(self, maxsize=50_000):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def get_or_render(self, key, render):
+        with self._lock:
+            s = self._items.get(key)
+            if s is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return s
+            self.misses += 1
+        s = render()
+        with self._lock:
+            self._items[key] = s
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return s
+
+
+def render_keywords_row(keywords):
+    if not keywords: return ""
+    chips = "".join(f'<span class="keyword-chip">{html.escape(kw)}</span>' for kw in keywords)
+    return f'<div class="keyword-row">{chips}</div>'
+
+
+def render_book_line(r):
+    """결과 dict(RecommenderView.results 한 항목) → 제목/저자/연도/쪽수 HTML (점수 제외)"""
+    creator = r["creator"] or "저자 정보 없음"
+    y = r["year"] or "N/A"
+    p = r["pages"] if r["pages"] is not None else "N/A"
+    return f"<b>{html.escape(r['title'])}</b> — {html.escape(creator)} (연도: {y}, 쪽수: {p})"
+
+
+def render_results_html(results, book_key=None, cache=None):
+    """결과 목록 전체 → <ul> HTML 문자열 하나
+
+    book_key(데이터셋 해시, 색인 세대)와 cache(FragmentCache)를 주면 책 줄과 칩 줄을 캐시에서 재사용.
+    """
+    items = []
+    for r in results:
+        if cache is None:
+            line, chips = render_book_line(r), render_keywords_row(r["keywords"])
+        else:
+            line = cache.get_or_render(("book", *book_key, r["row"]), lambda: render_book_line(r))
+            kw = tuple(r["keywords"])
+            chips = cache.get_or_render(("chips", kw), lambda: render_keywords_row(kw))
+        items.append(f"<li>{line}  · 콘텐츠점수: {r['content_score']:.3f} · 최종점수: {r['final_score']:.3f}"
+                     f"{chips}</li>")
+    return f'<ul class="rec-list">{"".join(items)}</ul>'
@@ -0,0 +1,177 @@
+"""가중 다중 필드 유사도 스코어링
+
+TF-IDF 행은 이미 L2 정규화되어 있으므로 네 필드 코사인 유사도의 가중합은
+필드 행렬을 가로로 쌓은 CSR 행렬과, 필드 가중치를 곱한 질의 벡터의 내적 한 번과 같다.
+  Σ_f w_f · cos(q_f, X_f) = [X_subj | X_desc | X_auth | X_pub] · [w_subj·q_subj | … | w_pub·q_pub]
+쌓은 행렬의 정밀도는 필드 행렬을 따르며(features.MATRIX_DTYPES), half=True면 data를 float16으로 보관하고
+float32로 누적하는 HalfCSR을 쓴다 (scipy.sparse는 float16을 지원하지 않음).
+"""
+import numpy as np
+
+from features import FIELDS, sparse_nbytes
+
+
+def top_k(scores, k, exclude=(), mask=None):
+    """점수 상위 k개 인덱스를 내림차순으로 — 전체 정렬 대신 argpartition (O(N) + O(k log k))
+
+    exclude(기준 도서 등)와 mask(False인 행 제외)는 선택 단계 안에서 적용하며,
+    동점은 인덱스가 작은 쪽이 앞선다. 조건을 만족하는 행이 k개보다 적으면 있는 만큼만 반환.
+    """
+    scores = np.asarray(scores)
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+    exclude = np.unique(np.asarray(exclude, dtype=np.int64))
+    kk = min(int(k) + len(exclude), len(scores))
+    if k <= 0 or kk <= 0:
+        return np.empty(0, dtype=np.int64)
+    if kk < len(scores):
+        # k번째 값 v를 O(N) 부분 선택으로 구하고, v와 같은 동점은 작은 인덱스부터 채움
+        # (argpartition만으로는 경계 동점 중 어느 것이 뽑힐지 정해지지 않음)
+        v = -np.partition(-scores, kk - 1)[kk - 1]
+        above = np.flatnonzero(scores > v)
+        cand = np.concatenate([above, np.flatnonzero(scores == v)[:kk - len(above)]])
+    else:
+        cand = np.arange(len(scores))
+    if len(exclude):
+        cand = cand[~np.isin(cand, exclude)]
+    if mask is not None:
+        cand = cand[np.asarray(mask)[cand]]
+    cand = cand[np.lexsort((cand, -scores[cand]))]
+    return cand[:k]
+
+
+class HalfCSR:
+    """float16 data + int32 indices/indptr CSR — 채점에 필요한 연산만 (행렬-벡터 곱, 행 선택, float32 변환)
+
+    곱은 행 블록(약 CHUNK_NNZ개 원소)마다 data를 float32로 풀어 scipy CSR 곱을 하므로 임시 메모리는
+    블록 하나 분량이다. 행 선택/tocsr()는 float32 scipy CSR을 돌려준다.
+    매 곱마다 float16 → float32 변환 비용이 들어 float32 행렬보다 2~4배 느리다 — 메모리가 더 급할 때만.
+    """
+    __slots__ = ("data", "indices", "indptr", "shape", "blocks")
+    CHUNK_NNZ = 1 << 20
+
+    def __init__(self, X):
+        self.data = X.data.astype(np.float16)
+        self.indices = X.indices.astype(np.int32, copy=False)
+        self.indptr = X.indptr.astype(np.int32, copy=False)
+        self.shape = X.shape
+        # 행 블록 경계: 원소 CHUNK_NNZ개마다 그 원소가 속한 행에서 자름
+        cuts = np.searchsorted(self.indptr, np.arange(0, len(self.data), self.CHUNK_NNZ), side="right") - 1
+        self.blocks = np.unique(np.concatenate([[0], cuts, [self.shape[0]]]))
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    def _block(self, r0, r1):
+        import scipy.sparse as sp
+        s, e = self.indptr[r0], self.indptr[r1]
+        return sp.csr_matrix((self.data[s:e].astype(np.float32), self.indices[s:e], self.indptr[r0:r1 + 1] - s),
+                             shape=(r1 - r0, self.shape[1]))
+
+    def __matmul__(self, q):
+        q = np.asarray(q, dtype=np.float32)
+        out = np.zeros(self.shape[0], dtype=np.float32)
+        for r0, r1 in zip(self.blocks[:-1].tolist(), self.blocks[1:].tolist()):
+            out[r0:r1] = self._block(r0, r1) @ q
+        return out
+
+    def __getitem__(self, rows):
+        import scipy.sparse as sp
+        rows = np.asarray(rows, dtype=np.int64)
+        starts, lens = self.indptr[rows], np.diff(self.indptr)[rows]
+        indptr = np.concatenate([[0], np.cumsum(lens)])
+        idx = np.repeat(starts - indptr[:-1], lens) + np.arange(indptr[-1])
+        return sp.csr_matrix((self.data[idx].astype(np.float32), self.indices[idx], indptr),
+                             shape=(len(rows), self.shape[1]))
+
+    def tocsr(self):
+        import scipy.sparse as sp
+        return sp.csr_matrix((self.data.astype(np.float32), self.indices, self.indptr), shape=self.shape)
+
+
+class ScoringEngine:
+    """필드 모델 + 가로로 쌓은 CSR 행렬 — 추천 한 번에 희소 행렬-벡터 곱 한 번
+
+    half=True면 쌓은 행렬을 HalfCSR(float16 보관)로 — 필드 행렬(이웃 그래프/ANN 빌드용)은 그대로.
+    """
+    __slots__ = ("models", "stacked", "offsets", "neighbors", "_neighbor_job", "ann")
+
+    def __init__(self, models, half=False):
+        import scipy.sparse as sp   # 지연 import (기동 시간) — top_k만 쓰는 경로는 scipy 불필요
+        mats = [models.matrices[f] for f in FIELDS]
+        self.models = models
+        self.stacked = sp.csr_matrix(sp.hstack(mats, format="csr"))
+        if half:
+            self.stacked = HalfCSR(self.stacked)
+        # 필드 f의 열 범위: offsets[k] <= col < offsets[k+1]
+        self.offsets = np.cumsum([0] + [X.shape[1] for X in mats])
+        self.neighbors = None          # neighbors.NeighborGraph (백그라운드 빌드 후 채워짐)
+        self._neighbor_job = None
+        self.ann = None                # ann.AnnIndex (근사 모드 선택 시 빌드)
+
+    @property
+    def nbytes(self):
+        n = self.models.nbytes + sparse_nbytes(self.stacked)
+        return n + sum(x.nbytes for x in (self.neighbors, self.ann) if x is not None)
+
+    @property
+    def n_items(self):
+        return self.stacked.shape[0]
+
+    @property
+    def half(self):
+        """쌓은 행렬이 float16 보관(HalfCSR)인지 — 이때 채점 값은 필드 행렬로 계산한 값과 조금 다름"""
+        return isinstance(self.stacked, HalfCSR)
+
+    @property
+    def dtype(self):
+        """채점(누적) dtype — float16 보관이면 float32"""
+        return np.float32 if self.half else self.stacked.dtype
+
+    def query_vector(self, q_indices, q_data, weights):
+        """희소 질의 (indices, data) → 필드 가중치를 곱한 밀집 질의 벡터 (재정규화 없음)"""
+        w = np.asarray(weights, dtype=np.float64)
+        field_of = np.searchsorted(self.offsets, q_indices, side="right") - 1
+        q = np.zeros(self.stacked.shape[1], dtype=self.dtype)
+        q[q_indices] = q_data * w[field_of]
+        return q
+
+    def _matvec(self, q_indices, q_data, weights):
+        return self.stacked @ self.query_vector(q_indices, q_data, weights)
+
+    def item_query(self, idx):
+        """도서 idx의 쌓은 행 → 희소 질의 (indices, data)"""
+        s, e = self.stacked.indptr[idx], self.stacked.indptr[idx + 1]
+        return self.stacked.indices[s:e], self.stacked.data[s:e]
+
+    def score_item(self, idx, weights):
+        """기준 도서 idx와 모든 도서의 가중 콘텐츠 유사도 (weights 순서는 FIELDS)"""
+        return self._matvec(*self.item_query(idx), weights)
+
+    def score_item_rows(self, idx, rows, weights):
+        """기준 도서 idx와 rows 도서들만의 가중 콘텐츠 유사도 (후보 재채점용)"""
+        return self.stacked[rows] @ self.query_vector(*self.item_query(idx), weights)
+
+    def transform_query(self, query):
+        """질의 문자열 → 쌓은 열 공간의 (indices, data)"""
+        import scipy.sparse as sp
+        parts_idx, parts_val = [], []
+        for f, off in zip(FIELDS, self.offsets):
+            vec = self.models.vectorizers[f]
+            if hasattr(vec, "transform_one"):       # features.SlicedTfidf — sklearn 호출 없는 한 줄 경로
+                idx, val = vec.transform_one(query)
+            else:
+                q = sp.csr_matrix(vec.transform([query]))
+                idx, val = q.indices, q.data
+            parts_idx.append(idx.astype(np.int64) + off)
+            parts_val.append(val)
+        return np.concatenate(parts_idx), np.concatenate(parts_val)
+
+    def score_query(self, query, weights):
+        """키워드 질의와 모든 도서의 가중 콘텐츠 유사도"""
+        return self._matvec(*self.transform_query(query), weights)
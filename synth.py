@@ -0,0 +1,171 @@
+"""국립중앙도서관(NLK) 형식을 흉내 낸 합성 카탈로그 생성기 — 벤치마크/부하 시험용
+
+    python synth.py --n 100000 --out books_100k.json.gz
+    python synth.py --n 1000000 --out books_1m.jsonl
+
+@graph JSON-LD(또는 JSON Lines)를 조각 단위로 써 내려가므로 1M권도 메모리에 다 올리지 않는다.
+분포는 실제 목록 데이터와 비슷하게:
+  - subject: 0~6개, 주제명 표목 어휘(약 3천 개)에서 Zipf 분포 — 상위 주제에 몰림
+  - description: 20%는 없음, 나머지는 로그정규 길이(중앙값 약 40단어)의 Zipf 단어열
+  - creator: 저자 수 ≈ N/6 Zipf, "지음/엮음/옮김" 등 역할어, 10%는 공저(목록)
+  - publisher: 출판사 수 ≈ min(N/40, 20000) Zipf
+  - issued: 최근 연도에 치우친 분포, "2019" / "c2019" / "2019-03-01" / "[2019]" 등 형식 혼재, 5% 없음
+  - extent: 쪽수 로그정규(중앙값 약 250쪽), "312 p. ; 23 cm" / "xii, 312p" / "312쪽" 등, 8% 없음
+같은 n과 seed면 같은 파일을 만든다.
+"""
+import argparse, gzip, json, sys
+
+import numpy as np
+
+SUBJECT_ROOTS = ["도서관학", "문헌정보학", "저작권", "디지털도서관", "정보검색", "메타데이터", "역사", "한국사",
+                 "세계사", "문학", "한국문학", "시", "소설", "수필", "철학", "윤리학", "심리학", "종교", "경제",
+                 "경영", "회계", "마케팅", "법학", "헌법", "행정", "정치", "사회학", "교육", "유아교육", "아동",
+                 "청소년", "과학", "물리학", "화학", "생물학", "수학", "통계", "컴퓨터", "인공지능", "프로그래밍",
+                 "데이터베이스", "의학", "간호", "건강", "요리", "여행", "예술", "음악", "미술", "건축", "사진",
+                 "영화", "언어", "영어", "일본어", "중국어", "지리", "환경", "농업", "공학"]
+SUBJECT_SUFFIXES = ["", " 연구", " 입문", " 교육", " 이론", " 역사", " 정책", " 사례", "[아동]", " 자료"]
+SYLLABLES = "가나다라마바사아자차카타파하거너더러머버서어저처커터퍼허고노도로모보소오조초코토포호구누두루무부수우주추"
+SURNAMES = "김이박최정강조윤장임한오서신권황안송류홍전고문양손배백허유남심노하곽성차주우구민진지엄채원천방공현함변염여추도소석선설마길연위표명기반왕금옥육인맹제모탁국어은편용"
+ROLES = ["지음", "지음", "지음", "저", "엮음", "편", "옮김", "글", "글·그림"]
+PUBLISHER_FORMS = ["{}", "{}출판사", "{}북스", "도서출판 {}", "{}미디어", "{}사"]
+DATE_FORMS = ["{y}", "{y}", "{y}", "c{y}", "{y}-{m:02d}-{d:02d}", "[{y}]", "{y}년", "{y}. {m}."]
+EXTENT_FORMS = ["{p} p. ; 23 cm", "{p} p. ; 21 cm", "xii, {p}p", "{p}쪽", "{p} p", "1책({p}p)", "{p} p. : 삽화 ; 26 cm"]
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def _zipf(rng, n_items, size, a=1.1):
+    # 1..n_items 순위의 Zipf(지수 a) 표본 → 0-기반 인덱스 (역CDF 표)
+    p = 1.0 / np.arange(1, n_items + 1) ** a
+    cdf = np.cumsum(p / p.sum())
+    return np.minimum(np.searchsorted(cdf, rng.random(size)), n_items - 1)
+
+
+def _names(rng, n, lo=2, hi=4):
+    # 임의 한글 음절 이름 n개
+    lens = rng.integers(lo, hi, size=n)
+    chars = rng.integers(0, len(SYLLABLES), size=int(lens.sum()))
+    out, pos = [], 0
+    for k in lens.tolist():
+        out.append("".join(SYLLABLES[c] for c in chars[pos:pos + k].tolist()))
+        pos += k
+    return out
+
+
+class Vocabulary:
+    """n(도서 수)에 맞춘 주제/단어/저자/출판사 어휘 — 생성기 전체에서 공유"""
+
+    def __init__(self, n, seed=0):
+        rng = np.random.default_rng(seed)
+        self.subjects = [r + s for s in SUBJECT_SUFFIXES for r in SUBJECT_ROOTS]
+        rng.shuffle(self.subjects)
+        words = _names(rng, 60_000, 1, 4) + [r for r in SUBJECT_ROOTS] * 5
+        self.words = list(dict.fromkeys(words))
+        n_auth = max(50, n // 6)
+        self.authors = [SURNAMES[s] + g for s, g in zip(rng.integers(0, len(SURNAMES), size=n_auth).tolist(),
+                                                       _names(rng, n_auth, 2, 3))]
+        n_pub = max(20, min(n // 40, 20_000))
+        forms = rng.integers(0, len(PUBLISHER_FORMS), size=n_pub).tolist()
+        self.publishers = [PUBLISHER_FORMS[f].format(name) for f, name in zip(forms, _names(rng, n_pub, 2, 4))]
+
+
+def generate_books(n, seed=0, chunk=50_000):
+    """도서 dict를 n권 차례로 (chunk권씩 numpy로 난수를 뽑아 만든다)"""
+    voc = Vocabulary(n, seed)
+    rng = np.random.default_rng(seed + 1)
+    for c0 in range(0, n, chunk):
+        m = min(chunk, n - c0)
+        n_subj = np.minimum(rng.poisson(1.6, size=m), 6)
+        subj = _zipf(rng, len(voc.subjects), int(n_subj.sum()), a=1.0)
+        has_desc = rng.random(m) >= 0.2
+        desc_len = np.where(has_desc, np.clip(rng.lognormal(3.7, 0.6, size=m), 3, 400).astype(np.int64), 0)
+        words = _zipf(rng, len(voc.words), int(desc_len.sum()), a=1.05)
+        title_len = rng.integers(1, 5, size=m)
+        title_words = _zipf(rng, len(voc.words), int(title_len.sum()), a=0.9)
+        auth = _zipf(rng, len(voc.authors), (m, 2), a=0.8)
+        co = rng.random(m) < 0.10
+        roles = rng.integers(0, len(ROLES), size=m)
+        pub = _zipf(rng, len(voc.publishers), m, a=1.0)
+        year = np.minimum(2026, 2026 - np.floor(rng.exponential(9.0, size=m))).astype(np.int64)
+        year = np.maximum(year, 1900)
+        date_form = rng.integers(0, len(DATE_FORMS), size=m)
+        month, day = rng.integers(1, 13, size=m), rng.integers(1, 29, size=m)
+        has_date = rng.random(m) >= 0.05
+        pages = np.clip(rng.lognormal(5.5, 0.55, size=m), 8, 3000).astype(np.int64)
+        ext_form = rng.integers(0, len(EXTENT_FORMS), size=m)
+        has_ext = rng.random(m) >= 0.08
+        s_pos = np.concatenate([[0], np.cumsum(n_subj)])
+        d_pos = np.concatenate([[0], np.cumsum(desc_len)])
+        t_pos = np.concatenate([[0], np.cumsum(title_len)])
+        subj, words, title_words = subj.tolist(), words.tolist(), title_words.tolist()
+        for i in range(m):
+            bk = {"@id": f"nlk:SYN{c0 + i:08d}",
+                  "title": " ".join(voc.words[w] for w in title_words[t_pos[i]:t_pos[i + 1]])}
+            subjects = list(dict.fromkeys(voc.subjects[s] for s in subj[s_pos[i]:s_pos[i + 1]]))
+            if subjects:
+                bk["subject"] = subjects if len(subjects) > 1 else subjects[0]
+            if has_desc[i]:
+                bk["description"] = " ".join(voc.words[w] for w in words[d_pos[i]:d_pos[i + 1]])
+            role = ROLES[roles[i]]
+            if co[i]:
+                bk["creator"] = [f"{voc.authors[auth[i, 0]]} {role}", f"{voc.authors[auth[i, 1]]} {role}"]
+            else:
+                bk["creator"] = f"{voc.authors[auth[i, 0]]} {role}"
+            bk["publisher"] = voc.publishers[pub[i]]
+            if has_date[i]:
+                bk["issued"] = DATE_FORMS[date_form[i]].format(y=year[i], m=month[i], d=day[i])
+            if has_ext[i]:
+                bk["extent"] = EXTENT_FORMS[ext_form[i]].format(p=pages[i])
+            yield bk
+
+
+def _open_out(path):
+    if path == "-":
+        return sys.stdout
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+    return open(path, "w", encoding="utf-8")
+
+
+def write_catalog(path, n, seed=0, jsonl=None):
+    """n권 합성 카탈로그를 path에 (jsonl=None이면 이름으로 판별: .jsonl/.ndjson → JSON Lines)"""
+    if jsonl is None:
+        jsonl = path.removesuffix(".gz").endswith((".jsonl", ".ndjson"))
+    f = _open_out(path)
+    try:
+        if jsonl:
+            for bk in generate_books(n, seed):
+                f.write(json.dumps(bk, ensure_ascii=False))
+                f.write("\n")
+        else:
+            f.write('{"@context": {"@vocab": "http://purl.org/dc/terms/"}, "@graph": [\n')
+            for i, bk in enumerate(generate_books(n, seed)):
+                if i:
+                    f.write(",\n")
+                f.write(json.dumps(bk, ensure_ascii=False))
+            f.write("\n]}\n")
+    finally:
+        if f is not sys.stdout:
+            f.close()
+
+
+def parse_size(s):
+    """"100k" / "1m" / "2500" → 권수"""
+    s = s.lower()
+    if s in SIZES:
+        return SIZES[s]
+    mult = {"k": 1_000, "m": 1_000_000}.get(s[-1:], 1)
+    return int(float(s[:-1] if mult > 1 else s) * mult)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=parse_size, default=SIZES["1k"], help="number of books (1k / 100k / 1m or an integer)")
+    ap.add_argument("--out", default="-", help="output path (.json, .jsonl, optionally .gz; - = stdout)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--jsonl", action="store_true", default=None, help="force JSON Lines")
+    args = ap.parse_args(argv)
+    write_catalog(args.out, args.n, args.seed, args.jsonl)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""재실행(rerun) 단계별 시간 측정 — 사이드바 진단 패널용 (opt-in)
+
+  - StageTimer: 한 번의 재실행 안에서 단계 이름별 경과 시간 (같은 이름이 여러 번 나오면 합산)
+  - TimingHistory: 단계별 최근 maxlen회 기록 → 직전 값, p50/p95
+측정을 끄면 NULL_TIMER(아무것도 재지 않음)를 써서 측정 비용이 없다.
+캐시 적중이면 해당 단계는 조회 시간만 잡히므로, 느린 클릭이 어느 단계(로드/토큰화/적합/채점/렌더링)에서
+캐시를 놓쳤는지 드러난다.
+"""
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+TOTAL = "재실행 전체"
+
+
+class StageTimer:
+    """stages: 단계 이름 → 초 (처음 나온 순서)"""
+    __slots__ = ("stages", "_t0")
+
+    def __init__(self):
+        self.stages = {}
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - t
+
+    def elapsed(self):
+        """타이머 생성 후 경과 시간(초)"""
+        return time.perf_counter() - self._t0
+
+
+class _NullTimer:
+    __slots__ = ()
+    stages = {}
+
+    def stage(self, name):
+        return nullcontext()
+
+    def elapsed(self):
+        return 0.0
+
+
+NULL_TIMER = _NullTimer()
+
+
+class TimingHistory:
+    """단계별 최근 maxlen회 시간(초) — record()는 재실행 한 번마다 한 번"""
+    __slots__ = ("maxlen", "samples")
+
+    def __init__(self, maxlen=200):
+        self.maxlen = maxlen
+        self.samples = {}          # 이름 → deque (처음 나온 순서)
+
+    def record(self, timer):
+        """timer의 단계별 시간과 지금까지의 재실행 전체 시간을 기록"""
+        for name, sec in [*timer.stages.items(), (TOTAL, timer.elapsed())]:
+            self.samples.setdefault(name, deque(maxlen=self.maxlen)).append(sec)
+
+    def clear(self):
+        self.samples.clear()
+
+    def summary(self, current=None):
+        """단계별 (이름, 이번 재실행 ms 또는 None, p50 ms, p95 ms, 표본 수) — current는 방금 record한 timer"""
+        out = []
+        names = [n for n in self.samples if n != TOTAL] + [TOTAL] * (TOTAL in self.samples)   # 전체는 맨 끝
+        for name in names:
+            xs = self.samples[name]
+            a = np.fromiter(xs, dtype=np.float64, count=len(xs)) * 1e3
+            now = None
+            if current is not None:
+                now = xs[-1] if name == TOTAL else current.stages.get(name)   # 전체는 record 시점 값
+                now = None if now is None else now * 1e3
+            out.append((name, now, float(np.percentile(a, 50)), float(np.percentile(a, 95)), len(a)))
+        return out
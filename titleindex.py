@@ -0,0 +1,100 @@
+"""제목 부분일치 검색용 문자 bigram 역색인
+
+제목을 NFC 정규화 + 소문자로 맞춘 뒤 제목 안의 연속한 두 글자(bigram)마다 그 제목 번호 목록(posting)을
+만든다. 한글 음절은 코드포인트 하나라 "도서관" → {"도서", "서관"}처럼 음절 bigram이 된다.
+두 글자 이상 질의는 질의의 bigram 목록을 짧은 것부터 교집합해 후보를 줄이고, 세 글자 이상이면
+후보 제목에 실제로 부분 문자열로 들어 있는지 확인한다. 한 글자 질의는 그 글자로 시작하거나
+끝나는 bigram 목록의 합집합(+ 한 글자 제목)이다.
+결과는 `q in title.lower()` 전수 검사와 같다(단, 양쪽 모두 NFC로 맞추므로 자모가 분리된
+NFD 제목도 찾는다).
+"""
+import unicodedata
+
+import numpy as np
+
+_SHIFT = 21                 # 유니코드 코드포인트 ≤ 0x10FFFF (21비트)
+VERIFY_DIRECT = 64          # 후보가 이보다 적으면 교집합을 멈추고 바로 확인
+
+
+def normalize_title(text):
+    return unicodedata.normalize("NFC", text or "").lower()
+
+
+class TitleIndex:
+    """grams: 정렬된 bigram 키 (앞 글자 << 21 | 뒷 글자), postings[indptr[g]:indptr[g+1]]: 그 bigram이 있는
+    제목 번호(오름차순), singles/single_chars: 한 글자 제목과 그 글자"""
+    __slots__ = ("n", "grams", "indptr", "postings", "singles", "single_chars")
+
+    def __init__(self, n, grams, indptr, postings, singles, single_chars):
+        self.n = n
+        self.grams = grams
+        self.indptr = indptr
+        self.postings = postings
+        self.singles = singles
+        self.single_chars = single_chars
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.grams, self.indptr, self.postings, self.singles, self.single_chars))
+
+    def _posting(self, key):
+        g = np.searchsorted(self.grams, key)
+        if g == len(self.grams) or self.grams[g] != key:
+            return None
+        return self.postings[self.indptr[g]:self.indptr[g + 1]]
+
+    def search(self, query, titles):
+        """질의가 부분 문자열로 들어 있는 제목 번호 (오름차순) — titles는 원래 제목 열(확인용)"""
+        q = normalize_title(query.strip())
+        if not q:
+            return np.zeros(0, dtype=np.int64)
+        c = [ord(ch) for ch in q]
+        if len(c) == 1:
+            return self._search_char(c[0])
+        keys = np.unique((np.array(c[:-1], dtype=np.int64) << _SHIFT) | np.array(c[1:], dtype=np.int64))
+        lists = [self._posting(k) for k in keys]
+        if any(p is None for p in lists):
+            return np.zeros(0, dtype=np.int64)
+        lists.sort(key=len)
+        cand = lists[0]
+        for p in lists[1:]:
+            if len(cand) <= VERIFY_DIRECT:
+                break
+            pos = np.searchsorted(p, cand)
+            cand = cand[p[np.minimum(pos, len(p) - 1)] == cand]
+        if len(c) > 2:
+            cand = np.array([i for i in cand.tolist() if q in normalize_title(titles[i])], dtype=np.int64)
+        return cand.astype(np.int64)
+
+    def _search_char(self, ch):
+        lo = np.searchsorted(self.grams, ch << _SHIFT)
+        hi = np.searchsorted(self.grams, (ch + 1) << _SHIFT)
+        ends = np.flatnonzero((self.grams & ((1 << _SHIFT) - 1)) == ch)
+        gs = np.union1d(np.arange(lo, hi), ends)
+        parts = [self.postings[self.indptr[g]:self.indptr[g + 1]] for g in gs.tolist()]
+        parts.append(self.singles[self.single_chars == ch])
+        return np.unique(np.concatenate(parts)).astype(np.int64)
+
+
+def build_title_index(titles):
+    """제목 열(TextColumn 또는 문자열 목록) → TitleIndex (코드포인트 배열 위 벡터 연산)"""
+    norm = [normalize_title(t) for t in (titles.to_list() if hasattr(titles, "to_list") else titles)]
+    n = len(norm)
+    lens = np.fromiter(map(len, norm), dtype=np.int64, count=n)
+    text = "\x00".join(norm)
+    c = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32).astype(np.int64)
+    row = np.repeat(np.arange(n, dtype=np.int32), lens + 1)[:len(c)]
+    is_sep = np.zeros(len(c) + 1, dtype=bool)
+    is_sep[np.cumsum(lens + 1)[:-1] - 1] = True          # 제목 사이 구분자 위치
+    valid = ~is_sep[:len(c) - 1] & ~is_sep[1:len(c)] if len(c) > 1 else np.zeros(0, dtype=bool)
+    keys = ((c[:-1] << _SHIFT) | c[1:])[valid]
+    prow = row[:-1][valid]
+    order = np.lexsort((prow, keys))
+    keys, prow = keys[order], prow[order]
+    keep = np.r_[True, (keys[1:] != keys[:-1]) | (prow[1:] != prow[:-1])] if len(keys) else np.zeros(0, dtype=bool)
+    keys, prow = keys[keep], prow[keep]
+    grams, first = np.unique(keys, return_index=True)
+    indptr = np.append(first, len(keys)).astype(np.int64)
+    singles = np.flatnonzero(lens == 1).astype(np.int32)
+    single_chars = np.array([ord(norm[i]) for i in singles.tolist()], dtype=np.int64)
+    return TitleIndex(n, grams, indptr, prow, singles, single_chars)
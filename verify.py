@@ -1,10 +1,14 @@
 import streamlit as st
-import json, re, datetime, os
-from collections import Counter
-import numpy as np
-import requests
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import datetime, os, io, hashlib, weakref
+from urllib.parse import urlsplit
+from catalog import is_jsonl_name, iter_books, stream_catalog, stream_catalog_file
+from httpcache import HttpCache
+from features import ModelCache
+from recommender import Recommender, normalize_weights
+from timing import NULL_TIMER, StageTimer, TimingHistory
+from resulthtml import RESULT_LIST_CSS, FragmentCache, render_results_html
+from memstats import (MIB, budget_warnings, catalog_rows, counts_rows, engine_rows, process_rss,
+                      session_rows, total_bytes)
 
 # =========================
 # 기본 세팅 & 스타일
@@ -13,139 +17,99 @@ st.set_page_config(page_title="국립중앙도서관 기반 도서 추천 시스
 st.title("📚 국립중앙도서관 기반 도서 추천 시스템")
 st.caption("JSON 업로드 또는 공개 URL → 페이지/키워드 필터 → 책 선택형(검색) / 키워드형 추천 · 주제/설명/저자/출판사 가중치 + 출간일 최근 5년 가중치")
 
-# 관련 키워드 칩(결과 표시용): 연한 분홍색
-st.markdown("""
-<style>
-.keyword-row { margin: .25rem 0 .5rem 0; }
-.keyword-chip {
-  display:inline-block; padding: 4px 10px; margin: 3px 8px 3px 0;
-  background:#fecdd3; color:#7a1330; border-radius:8px; font-size:0.85rem;
-  line-height:1.2; font-weight:700; border:1px solid #fda4af;
-}
-</style>
-""", unsafe_allow_html=True)
+# 결과 목록 + 관련 키워드 칩(결과 표시용): 연한 분홍색
+st.markdown(f"<style>{RESULT_LIST_CSS}</style>", unsafe_allow_html=True)
 
 # =========================
-# 안전 로더 / 유틸
+# (옵션) 단계별 시간 측정 — 사이드바 맨 아래 체크박스 / BREC_TIMING=1이면 기본 켜짐
+# 체크박스는 패널과 함께 스크립트 끝에서 그리므로, 이번 재실행의 켜짐 여부는 session_state에서 읽음
 # =========================
-def safe_json_from_text(text: str):
-    text = text.lstrip("\ufeff")  # BOM 제거
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        decoder = json.JSONDecoder()
-        obj, _ = decoder.raw_decode(text.lstrip())
-        return obj
-
-def safe_load_json_file(path:str):
-    with open(path, "r", encoding="utf-8-sig") as f:
-        txt = f.read()
-    return safe_json_from_text(txt)
-
-def safe_load_json_uploaded(uploaded_file):
-    txt = uploaded_file.read().decode("utf-8-sig")
-    return safe_json_from_text(txt)
-
-def safe_load_json_url(url: str, timeout=15):
-    r = requests.get(url, timeout=timeout)
-    r.raise_for_status()
-    # 일부 호스팅은 text/json 헤더 없이 내려줄 수 있으므로 text로 처리
-    return safe_json_from_text(r.text)
-
-def to_text(v):
-    if v is None: return ""
-    if isinstance(v, str): return v
-    if isinstance(v, (int, float, bool)): return str(v)
-    if isinstance(v, list): return " ".join(to_text(x) for x in v)
-    if isinstance(v, dict): return " ".join(to_text(x) for x in v.values())
-    return str(v)
-
-def to_list(v):
-    if v is None: return []
-    if isinstance(v, list):
-        out = []
-        for x in v:
-            if isinstance(x, str): s = x.strip(); 
-            elif isinstance(x, dict): s = to_text(list(x.values())).strip()
-            else: s = to_text(x).strip()
-            if s: out.append(s)
-        return out
-    if isinstance(v, dict):
-        return [to_text(x).strip() for x in v.values() if to_text(x).strip()]
-    if isinstance(v, str):
-        return [v.strip()] if v.strip() else []
-    s = to_text(v).strip()
-    return [s] if s else []
-
-YEAR_RE = re.compile(r"(19|20)\d{2}")
-PAGES_RE = re.compile(r"(\d+)\s*p\b", re.IGNORECASE)
-
-def extract_year(book):
-    for c in [to_text(book.get("issuedYear")),
-              to_text(book.get("issued")),
-              to_text(book.get("datePublished")),
-              to_text(book.get("publicationDate"))]:
-        m = YEAR_RE.search(c or "")
-        if m:
-            try: return int(m.group(0))
-            except: pass
-    return None
-
-def extract_pages(book):
-    ext = to_list(book.get("extent"))
-    found = []
-    for token in ext:
-        for m in PAGES_RE.finditer(token):
-            try: found.append(int(m.group(1)))
-            except: pass
-    return max(found) if found else None
-
-def recency_weight(year, now_year=None):
-    """최근 5년 선형 가중치 (올해=1.0 … 5년 이상=0)"""
-    if year is None: return 0.0
-    if now_year is None: now_year = datetime.date.today().year
-    d = max(now_year - year, 0)
-    return (5 - d) / 5.0 if d <= 5 else 0.0
-
-def pick_related_keywords(subjects, picked_keywords=None, top_n=3):
-    subs = [s for s in subjects if s]
-    if not subs: return []
-    picked_set = set([k.strip() for k in (picked_keywords or []) if k.strip()])
-    inter = [s for s in subs if s in picked_set]
-    result = inter[:top_n]
-    if len(result) < top_n:
-        for s in subs:
-            if s not in result:
-                result.append(s)
-            if len(result) >= top_n:
-                break
-    return result[:top_n]
-
-def render_keywords_row(keywords):
-    if not keywords: return ""
-    chips = "".join(f'<span class="keyword-chip">{kw}</span>' for kw in keywords)
-    return f'<div class="keyword-row">{chips}</div>'
+TIMING_DEFAULT = os.environ.get("BREC_TIMING", "0") == "1"
+TIMING_HISTORY = int(os.environ.get("BREC_TIMING_HISTORY", "200"))        # 단계별로 보관할 최근 기록 수
+timer = StageTimer() if st.session_state.get("timing_enabled", TIMING_DEFAULT) else NULL_TIMER
 
 # =========================
-# 데이터 변환
+# 데이터셋 캐시 (세션 간 공유) — 원본 바이트 해시 / 파일 mtime 키
+# 위젯 조작마다 스크립트가 재실행되어도 다운로드·JSON 파싱·레코드 추출을 반복하지 않음
+# URL 본문은 디스크 HTTP 캐시(httpcache)에 받아 두고 그 파일을 로컬 파일처럼 파싱 —
+# TTL 이내에는 네트워크 요청이 없고, 이후에는 조건부 요청(304)으로만 확인, 원본 장애 시 디스크 본문 사용
+# 각 로더는 (내용 해시, catalog)를 반환 — 내용 해시는 모델 캐시 키로 사용
+# catalog는 @graph를 원소 단위로 스트리밍 파싱해 바로 쌓은 열 지향 Catalog (원본 dict 미보관)
 # =========================
-def build_records(data):
-    if not isinstance(data, dict): return []
-    books = data.get("@graph", [])
-    if not isinstance(books, list) or not books: return []
-    recs = []
-    for bk in books:
-        recs.append({
-            "title": to_text(bk.get("title")) or "(제목 없음)",
-            "subjects": to_list(bk.get("subject")),
-            "desc": to_text(bk.get("description")),
-            "creator": to_text(bk.get("creator")),
-            "publisher": to_text(bk.get("publisher")),
-            "year": extract_year(bk),
-            "pages": extract_pages(bk),
-            "raw": bk,
-        })
-    return recs
+DATASET_CACHE_ENTRIES = 4      # 동시에 상주시킬 카탈로그 수
+HTTP_CACHE_DIR = os.environ.get("BREC_HTTP_CACHE_DIR", os.path.expanduser("~/.cache/b-rec/http"))
+HTTP_CACHE_TTL = int(os.environ.get("BREC_HTTP_CACHE_TTL", "300"))       # 재검증 없이 디스크 본문을 쓰는 시간(초)
+MODEL_CACHE_BUDGET_MB = int(os.environ.get("BREC_MODEL_CACHE_MB", "512"))  # TF-IDF 모델 캐시 예산
+NEIGHBOR_K = int(os.environ.get("BREC_NEIGHBOR_K", "50"))                  # 필드별 이웃 수 (0=사용 안 함)
+NEIGHBOR_MAX_ITEMS = int(os.environ.get("BREC_NEIGHBOR_MAX_ITEMS", "50000"))  # 이웃 그래프 빌드 O(N²) 상한
+NEIGHBOR_EXACT = os.environ.get("BREC_NEIGHBOR_EXACT", "1") == "1"         # 전수 계산과 같은 결과 보장 (0=근사 병합, 결과가 달라질 수 있음)
+HASHING_FEATURES = int(os.environ.get("BREC_HASHING_FEATURES", "0"))         # >0이면 필드별 해싱 차원 (어휘 사전 없음)
+INGEST_WORKERS = int(os.environ.get("BREC_INGEST_WORKERS", "0"))            # 병렬 수집 프로세스 수 (0=CPU 수)
+INGEST_PARALLEL_MIN_MB = int(os.environ.get("BREC_INGEST_PARALLEL_MIN_MB", "64"))  # 이보다 작은 입력은 직렬 수집
+MEMORY_BUDGET_MB = int(os.environ.get("BREC_MEMORY_BUDGET_MB", "2048"))    # 프로세스 RSS 경고 기준 (0=끔)
+DATASET_BUDGET_MB = int(os.environ.get("BREC_DATASET_BUDGET_MB", "1024"))  # 상주 데이터셋(카탈로그+색인) 합계 경고 기준
+SESSION_BUDGET_MB = int(os.environ.get("BREC_SESSION_BUDGET_MB", "64"))    # 세션 하나의 session_state 경고 기준
+MATRIX_DTYPE = os.environ.get("BREC_MATRIX_DTYPE", "float64")             # 행렬 정밀도: float64 / float32 / float16(쌓은 행렬만)
+PRUNING = os.environ.get("BREC_PRUNING", "")                               # 필드별 어휘 가지치기 (JSON 또는 JSON 파일 경로, features.parse_pruning)
+RENDER_CACHE_ENTRIES = int(os.environ.get("BREC_RENDER_CACHE_ENTRIES", "50000"))  # 미리 렌더링한 책 줄/칩 HTML 수
+
+def ingest_workers(nbytes):
+    """입력 크기에 따른 수집 프로세스 수 — 작은 입력은 프로세스 기동 비용이 더 크므로 직렬"""
+    return (INGEST_WORKERS or None) if nbytes >= INGEST_PARALLEL_MIN_MB * 2**20 else 1
+
+@st.cache_resource(max_entries=DATASET_CACHE_ENTRIES, show_spinner="업로드 JSON 파싱 중…")
+def cached_catalog_from_bytes(digest: str, _raw: bytes, jsonl: bool = False):
+    return digest, stream_catalog(io.BytesIO(_raw), jsonl, workers=ingest_workers(len(_raw)))
+
+@st.cache_resource(max_entries=DATASET_CACHE_ENTRIES, show_spinner="JSON 파일 파싱 중…")
+def cached_catalog_from_file(path: str, mtime_ns: int, size: int, jsonl: bool = False):
+    return stream_catalog_file(path, jsonl, workers=ingest_workers(size))
+
+@st.cache_resource(max_entries=DATASET_CACHE_ENTRIES, show_spinner="전체 카탈로그 토큰화 중…")
+def cached_recommender(dataset_digest: str, n_records: int, n_features: int, matrix_dtype: str, pruning: str,
+                       _catalog):
+    # 전체 카탈로그의 필드별 카운트 색인 + 공용 모델 캐시 — 필터가 바뀌어도 다시 토큰화하지 않음.
+    # 신규 도서는 add_books로 이 색인에 증분 반영 (모든 세션이 같은 색인을 봄)
+    return Recommender.build(
+        dataset_digest, _catalog, n_features=n_features, model_cache=shared_model_cache(),
+        neighbor_k=NEIGHBOR_K, neighbor_max_items=NEIGHBOR_MAX_ITEMS, neighbor_exact=NEIGHBOR_EXACT,
+        matrix_dtype=matrix_dtype, pruning=pruning,
+    )
+
+@st.cache_resource
+def shared_http_cache():
+    return HttpCache(HTTP_CACHE_DIR, ttl=HTTP_CACHE_TTL)
+
+def cached_catalog_from_url(url: str, timeout=20):
+    """URL → 디스크 캐시 본문 → (내용 해시, catalog), 그리고 캐시 상태(CachedBody)"""
+    body = shared_http_cache().fetch(url, timeout=timeout)
+    stat = os.stat(body.path)
+    jsonl = is_jsonl_name(urlsplit(url).path)   # 캐시 파일 이름에는 확장자가 없으므로 URL로 판별
+    return (*cached_catalog_from_file(body.path, stat.st_mtime_ns, stat.st_size, jsonl), body)
+
+@st.cache_resource
+def dataset_registry():
+    # 상주 중인 데이터셋별 Recommender (메모리 진단용) — cache_resource에서 밀려나면 함께 사라짐
+    return weakref.WeakValueDictionary()
+
+@st.cache_resource
+def shared_fragment_cache():
+    # 프로세스 공용 결과 HTML 조각(책 줄, 키워드 칩) LRU
+    return FragmentCache(RENDER_CACHE_ENTRIES)
+
+@st.cache_resource
+def shared_model_cache():
+    # 프로세스 전체(모든 세션) 공용 TF-IDF 모델 LRU
+    return ModelCache(budget_bytes=MODEL_CACHE_BUDGET_MB * 2**20)
+
+def uploaded_digest(uploaded_file):
+    """업로드 파일 내용 해시 (같은 업로드는 세션 내에서 한 번만 해시)"""
+    memo = st.session_state.setdefault("upload_digests", {})
+    digest = memo.get(uploaded_file.file_id)
+    if digest is None:
+        digest = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+        memo[uploaded_file.file_id] = digest
+    return digest
 
 # =========================
 # 데이터 입력: 업로드 / 공개 URL / (옵션)로컬 샘플
@@ -159,95 +123,110 @@ sample_url = st.sidebar.text_input(
     help="GitHub raw, Dropbox 'dl=1', Google Drive 'uc?export=download&id=' 등 공개로 접근 가능한 URL을 넣어주세요."
 )
 
-uploaded = st.file_uploader("또는 JSON 직접 업로드 (.json)", type=["json"])
+uploaded = st.file_uploader(
+    "또는 JSON 직접 업로드 (.json / .jsonl, gzip·bz2·zstd 압축 가능)",
+    type=["json", "jsonl", "ndjson", "gz", "bz2", "zst"],
+)
 
-data = None
+catalog = None
 
 if uploaded is not None:
     try:
-        data = safe_load_json_uploaded(uploaded)
+        with timer.stage("카탈로그 로드"):
+            dataset_digest, catalog = cached_catalog_from_bytes(
+                uploaded_digest(uploaded), uploaded.getvalue(), is_jsonl_name(uploaded.name))
         st.sidebar.success("업로드된 JSON을 불러왔습니다.")
     except Exception as e:
         st.sidebar.error(f"업로드 JSON 읽기 실패: {e}")
 
 elif use_url and sample_url.strip():
     try:
-        data = safe_load_json_url(sample_url.strip(), timeout=20)
-        st.sidebar.success("공개 URL에서 샘플 JSON을 불러왔습니다.")
+        url = sample_url.strip()
+        with st.spinner("URL에서 JSON 불러오는 중…"), timer.stage("카탈로그 로드"):
+            dataset_digest, catalog, body = cached_catalog_from_url(url, timeout=20)
+        if body.status == "stale":
+            fetched = datetime.datetime.fromtimestamp(body.fetched_at).strftime("%Y-%m-%d %H:%M")
+            st.sidebar.warning(f"원본 URL에 연결할 수 없어 디스크 캐시({fetched} 기준)를 사용합니다.")
+        else:
+            st.sidebar.success("공개 URL에서 샘플 JSON을 불러왔습니다.")
     except Exception as e:
         st.sidebar.error(f"URL 로드 실패: {e}")
 
 # (선택) 같은 폴더의 로컬 샘플 파일 자동 탐지 — URL/업로드 실패 대비
-if data is None:
+if catalog is None:
     local_sample = "nlk_books_500_ko_diverse.json"
     if os.path.exists(local_sample):
         try:
-            data = safe_load_json_file(local_sample)
+            stat = os.stat(local_sample)
+            with timer.stage("카탈로그 로드"):
+                dataset_digest, catalog = cached_catalog_from_file(local_sample, stat.st_mtime_ns, stat.st_size)
             st.sidebar.info(f"로컬 샘플 사용: {local_sample}")
         except Exception as e:
             st.sidebar.error(f"로컬 샘플 읽기 실패: {e}")
 
-if data is None:
+if catalog is None:
     st.error("유효한 JSON 데이터를 불러오지 못했습니다. URL 또는 업로드를 확인해 주세요.")
     st.stop()
 
-records = build_records(data)
-if not records:
+if not len(catalog):
     st.warning("⚠️ '@graph' 내 도서 데이터를 찾지 못했습니다.")
     st.stop()
 
+# =========================
+# 신규 도서 증분 반영 — 새 도서만 토큰화해 카운트 행렬에 행으로 추가 (전체 재색인 없음)
+# 같은 파일은 한 번만 반영(index.applied), 이후 catalog는 색인의 현재 세대를 사용
+# =========================
+with timer.stage("색인(토큰화)"):
+    rec = cached_recommender(dataset_digest, len(catalog), HASHING_FEATURES, MATRIX_DTYPE, PRUNING, catalog)
+dataset_registry()[dataset_digest] = rec
+additions = st.sidebar.file_uploader(
+    "신규 도서 추가 (증분 반영, .json / .jsonl)", type=["json", "jsonl", "ndjson", "gz", "bz2", "zst"],
+    key="additions",
+)
+if additions is not None:
+    digest = uploaded_digest(additions)
+    if digest not in rec.index.applied:
+        try:
+            books = list(iter_books(io.BytesIO(additions.getvalue()), is_jsonl_name(additions.name)))
+            with st.spinner(f"신규 도서 {len(books):,}권 반영 중…"), timer.stage("신규 도서 반영"):
+                added = rec.add_books(books, key=digest)
+            if added is not None and added[1] is not None:
+                st.session_state.matched_indices = []      # 압축으로 행 번호가 바뀜 — 이전 검색 결과는 무효
+            st.sidebar.success(f"신규 도서 {len(books):,}권을 반영했습니다.")
+        except Exception as e:
+            st.sidebar.error(f"신규 도서 반영 실패: {e}")
+catalog = rec.catalog
+
 # =========================
 # 페이지 필터
 # =========================
-pages_list = [r["pages"] for r in records if r["pages"] is not None]
-min_pages, max_pages = (int(min(pages_list)), int(max(pages_list))) if pages_list else (0, 2000)
+pages_list = catalog.pages[catalog.has_pages]
+min_pages, max_pages = (int(pages_list.min()), int(pages_list.max())) if len(pages_list) else (0, 2000)
 
 st.sidebar.header("🔎 필터 & 가중치")
 include_no_pages = st.sidebar.checkbox("쪽수 정보 없는 자료도 포함", value=True)
 page_range = st.sidebar.slider("페이지(쪽) 범위", min_value=min_pages, max_value=max_pages,
                                value=(min_pages, max_pages))
 
-def pass_page_filter(p):
-    if p is None: return include_no_pages
-    return page_range[0] <= p <= page_range[1]
-
-filtered = [r for r in records if pass_page_filter(r["pages"])]
-if not filtered:
+with timer.stage("페이지 필터"):
+    filter_mask = rec.page_mask(page_range, include_no_pages)
+if not filter_mask.any():
     st.warning("⚠️ 페이지 필터 조건에 맞는 도서가 없습니다. 범위를 넓혀주세요.")
     st.stop()
 
 # =========================
-# 상위 10 키워드
-# =========================
-all_subjects = []
-for r in filtered: all_subjects.extend(r["subjects"])
-top_keywords = [kw for kw, _ in Counter([s for s in all_subjects if s]).most_common(10)]
-
-# =========================
-# 말뭉치(제목/KDC 제외)
+# 필터된 행으로 적합한 추천 뷰 (말뭉치: 제목/KDC 제외)
+# 필터된 행의 카운트만 잘라 문서빈도/IDF 재계산 — 같은 행 집합이면 공용 모델 캐시 재사용,
+# 책 선택형 추천용 이웃 그래프는 백그라운드에서 한 번만 빌드 (완료 전엔 전수 계산)
 # =========================
-titles = [r["title"] for r in filtered]
-subject_texts = [" ".join(r["subjects"]) for r in filtered]
-desc_texts = [r["desc"] for r in filtered]
-author_texts = [r["creator"] for r in filtered]
-publisher_texts = [r["publisher"] for r in filtered]
-years = [r["year"] for r in filtered]
-pages = [r["pages"] for r in filtered]
-raw_books = [r["raw"] for r in filtered]
-subjects_by_idx = [r["subjects"] for r in filtered]
-
-vec_subj = TfidfVectorizer()
-vec_desc = TfidfVectorizer()
-vec_auth = TfidfVectorizer()
-vec_pub  = TfidfVectorizer()
-
-X_subj  = vec_subj.fit_transform(subject_texts)
-X_desc  = vec_desc.fit_transform(desc_texts)
-X_auth  = vec_auth.fit_transform(author_texts)
-X_pub   = vec_pub.fit_transform(publisher_texts)
-
-now_year = datetime.date.today().year
-recency_vec = np.array([recency_weight(y, now_year) for y in years], dtype=float)
+with timer.stage("TF-IDF 적합(뷰)"):
+    try:
+        view = rec.view(filter_mask, now_year=datetime.date.today().year)
+    except ValueError as e:
+        st.sidebar.error(f"이 필터로 모델을 적합할 수 없습니다 (가지치기 설정 확인): {e}")
+        st.stop()
+with timer.stage("상위 키워드"):
+    top_keywords = view.top_subjects(n=10)
 
 # =========================
 # 가중치 UI
@@ -258,22 +237,28 @@ w_desc = st.sidebar.slider("설명(요약) 가중치", 0.0, 1.0, 0.30, 0.05)
 w_auth = st.sidebar.slider("저자 가중치", 0.0, 1.0, 0.15, 0.05)
 w_pub  = st.sidebar.slider("출판사 가중치", 0.0, 1.0, 0.10, 0.05)
 
-w_sum = w_subj + w_desc + w_auth + w_pub
-if w_sum == 0:
-    w_subj, w_desc, w_auth, w_pub = 0.45, 0.30, 0.15, 0.10
-    w_sum = 1.0
-w_subj, w_desc, w_auth, w_pub = [w / w_sum for w in [w_subj, w_desc, w_auth, w_pub]]
+content_weights = normalize_weights((w_subj, w_desc, w_auth, w_pub))  # 합 1, features.FIELDS 순서
 
 st.sidebar.markdown("### ⏱ 출간일 최근 5년 가중치")
 w_recency = st.sidebar.slider("출간일 최근 5년 가중치", 0.0, 0.8, 0.30, 0.05,
                               help="최종 점수 = (1-비율)*콘텐츠점수 + (비율)*최근성")
 top_n = st.sidebar.slider("추천 개수 (Top N)", 3, 15, 5)
 
-def combine_content_score(s_subj, s_desc, s_auth, s_pub):
-    return (w_subj*s_subj + w_desc*s_desc + w_auth*s_auth + w_pub*s_pub)
-
-def final_score(content_sim, rec_vec):
-    return (1 - w_recency) * content_sim + w_recency * rec_vec
+st.sidebar.markdown("### 🧭 유사도 계산 방식")
+search_mode = st.sidebar.radio("계산 방식", ["정확(전수)", "근사(ANN)"], horizontal=True,
+                               help="근사: SVD 투영 + 클러스터(IVF) 후보만 정확히 재채점 — 대규모 카탈로그용")
+ann_nprobe = None                                  # None이면 전수 계산
+if search_mode == "근사(ANN)":
+    ann_nprobe = st.sidebar.slider("탐색 클러스터 수 (nprobe)", 1, 64, 8,
+                                   help="클수록 정확도(재현율)↑ 속도↓")
+    with st.spinner("ANN 색인 생성 중…"), timer.stage("ANN 색인"):
+        view.ensure_ann()
+
+def render_results(results):
+    # 결과 전체를 HTML 요소 하나로 (프론트엔드 메시지 1개) — 책 줄/칩 HTML은 공용 캐시에서 재사용
+    with timer.stage("결과 렌더링"):
+        st.markdown(render_results_html(results, (rec.digest, view.generation), shared_fragment_cache()),
+                    unsafe_allow_html=True)
 
 # =========================
 # 레이아웃
@@ -294,51 +279,34 @@ with col1:
             st.warning("검색어를 입력하세요.")
             st.session_state.matched_indices = []
         else:
-            matches = [i for i, t in enumerate(titles) if q in (t or "").lower()]
+            with timer.stage("제목 검색"):
+                matches = view.search_titles(q).tolist()  # 필터된 목록 안의 위치
             if not matches:
                 st.info("검색 결과가 없습니다. 다른 키워드로 시도해보세요.")
             st.session_state.matched_indices = matches
 
     if st.session_state.matched_indices:
-        options = [titles[i] for i in st.session_state.matched_indices]
+        options = [catalog.title[view.rows[i]] for i in st.session_state.matched_indices]
         sel_title = st.selectbox("검색 결과에서 기준 도서를 선택하세요", options=options, index=0, key="select_matched_title")
 
         if st.button("이 책과 비슷한 도서 추천", use_container_width=True):
             target_title = st.session_state.select_matched_title
             idx = None
             for i in st.session_state.matched_indices:
-                if titles[i] == target_title:
+                if catalog.title[view.rows[i]] == target_title:
                     idx = i; break
             if idx is None:
                 st.error("선택한 책을 찾을 수 없습니다.")
             else:
-                s_subj = cosine_similarity(X_subj[idx], X_subj).flatten()
-                s_desc = cosine_similarity(X_desc[idx], X_desc).flatten()
-                s_auth = cosine_similarity(X_auth[idx], X_auth).flatten()
-                s_pub  = cosine_similarity(X_pub[idx],  X_pub ).flatten()
-
-                content_sim = combine_content_score(s_subj, s_desc, s_auth, s_pub)
-                final = final_score(content_sim, recency_vec)
-
-                order = final.argsort()[::-1]
-                recs = [i for i in order if i != idx][:top_n]
-
+                with timer.stage("책 추천 채점"):
+                    recs = view.recommend_by_book(idx, content_weights, w_recency, top_n, nprobe=ann_nprobe)
                 st.write(f"**기준 도서:** {target_title}")
-                if not recs:
+                if not len(recs[0]):
                     st.info("추천 결과가 없습니다.")
                 else:
-                    for i in recs:
-                        creator = to_text(raw_books[i].get("creator")) or "저자 정보 없음"
-                        y = years[i] or "N/A"
-                        p = pages[i] if pages[i] is not None else "N/A"
-                        rel_keywords = pick_related_keywords(subjects_by_idx[i], picked_keywords=None, top_n=3)
-                        kw_html = render_keywords_row(rel_keywords)
-                        st.markdown(
-                            f"- **{titles[i]}** — {creator} (연도: {y}, 쪽수: {p})  "
-                            f"· 콘텐츠점수: {content_sim[i]:.3f} · 최종점수: {final[i]:.3f}",
-                            unsafe_allow_html=True
-                        )
-                        st.markdown(kw_html, unsafe_allow_html=True)
+                    with timer.stage("결과 레코드"):
+                        results = view.results(*recs)
+                    render_results(results)
     else:
         st.caption("검색 후 결과 목록에서 기준 도서를 선택하세요.")
 
@@ -354,30 +322,68 @@ with col2:
             st.warning("키워드를 선택하거나 입력해 주세요.")
         else:
             query = " ".join(picked + ([q.strip()] if (q or "").strip() else []))
-            q_subj = vec_subj.transform([query])
-            q_desc = vec_desc.transform([query])
-            q_auth = vec_auth.transform([query])
-            q_pub  = vec_pub.transform([query])
-
-            s_subj = cosine_similarity(q_subj, X_subj).flatten()
-            s_desc = cosine_similarity(q_desc, X_desc).flatten()
-            s_auth = cosine_similarity(q_auth, X_auth).flatten()
-            s_pub  = cosine_similarity(q_pub,  X_pub ).flatten()
+            with timer.stage("키워드 추천 채점"):
+                recs = view.recommend_by_keywords(query, content_weights, w_recency, top_n, nprobe=ann_nprobe)
+            st.write(f"**입력/선택 키워드:** {query}")
+            with timer.stage("결과 레코드"):
+                results = view.results(*recs, picked_keywords=picked)
+            render_results(results)
 
-            content_sim = combine_content_score(s_subj, s_desc, s_auth, s_pub)
-            final = final_score(content_sim, recency_vec)
+# =========================
+# (옵션) 단계별 시간 패널 — 이번 재실행 + 세션의 최근 기록 p50/p95 (캐시 적중 단계는 조회 시간만 잡힘)
+# =========================
+st.sidebar.markdown("### 🩺 진단")
+st.sidebar.checkbox("⏱ 단계별 시간 측정", value=TIMING_DEFAULT, key="timing_enabled",
+                    help="이번 재실행과 추천 요청의 단계별 시간, 최근 기록의 p50/p95")
+if timer is not NULL_TIMER:
+    history = st.session_state.setdefault("timing_history", TimingHistory(TIMING_HISTORY))
+    history.record(timer)
+    with st.sidebar.expander("단계별 시간 (ms)", expanded=True):
+        fmt = lambda v: "–" if v is None else f"{v:,.1f}"
+        lines = ["| 단계 | 이번 | p50 | p95 | n |", "|---|---:|---:|---:|---:|"]
+        lines += [f"| {name} | {fmt(now)} | {fmt(p50)} | {fmt(p95)} | {n} |"
+                  for name, now, p50, p95, n in history.summary(timer)]
+        st.markdown("\n".join(lines))
+        if st.button("기록 지우기", key="timing_clear"):
+            history.clear()
 
-            order = final.argsort()[::-1][:top_n]
-            st.write(f"**입력/선택 키워드:** {query}")
-            for i in order:
-                creator = to_text(raw_books[i].get("creator")) or "저자 정보 없음"
-                y = years[i] or "N/A"
-                p = pages[i] if pages[i] is not None else "N/A"
-                rel_keywords = pick_related_keywords(subjects_by_idx[i], picked_keywords=picked, top_n=3)
-                kw_html = render_keywords_row(rel_keywords)
-                st.markdown(
-                    f"- **{titles[i]}** — {creator} (연도: {y}, 쪽수: {p})  "
-                    f"· 콘텐츠점수: {content_sim[i]:.3f} · 최종점수: {final[i]:.3f}",
-                    unsafe_allow_html=True
-                )
-                st.markdown(kw_html, unsafe_allow_html=True)
+# =========================
+# (옵션) 메모리 사용량 — 상주 데이터셋별 카탈로그/카운트 색인/어휘 사전, 공용 모델 캐시,
+# 현재 뷰의 필드별 TF-IDF 행렬, 이 세션의 session_state. 예산 초과 경고는 항상 확인
+# (RSS는 /proc 읽기 한 번, 모델 캐시는 항목별로 미리 잰 크기의 합이라 싸다)
+# =========================
+model_cache = shared_model_cache()
+usage = {"프로세스 RSS": process_rss(), "모델 캐시": model_cache.nbytes}
+budgets = {"프로세스 RSS": MEMORY_BUDGET_MB * MIB, "모델 캐시": MODEL_CACHE_BUDGET_MB * MIB,
+           "상주 데이터셋": DATASET_BUDGET_MB * MIB, "세션 상태": SESSION_BUDGET_MB * MIB}
+show_memory = st.sidebar.checkbox("🧠 메모리 사용량", value=False, key="memory_enabled",
+                                  help="카탈로그·TF-IDF 행렬·어휘 사전·세션 상태의 추정 메모리와 예산 초과 경고")
+if show_memory:
+    datasets = list(dataset_registry().items())
+    dataset_bytes = {d: r.index.nbytes for d, r in datasets}
+    sess = session_rows(st.session_state)
+    usage.update({"상주 데이터셋": sum(dataset_bytes.values()), "세션 상태": total_bytes(sess)})
+for w in budget_warnings(usage, budgets):
+    st.sidebar.warning(f"⚠️ 메모리 예산 초과 — {w}")
+if show_memory:
+    def mem_table(rows):
+        mib = lambda r, k: f"{r[k] / MIB:,.2f}" if k in r else ""
+        num = lambda r, k: f"{r[k]:,}" if k in r else ""
+        lines = ["| 구성 요소 | 세부 | MiB | nnz | data | index | 항목 수 |", "|---|---|---:|---:|---:|---:|---:|"]
+        lines += [f"| {r['component']} | {r['part']} | {mib(r, 'bytes')} | {num(r, 'nnz')} | {mib(r, 'data_bytes')} "
+                  f"| {mib(r, 'index_bytes')} | {num(r, 'entries')} |" for r in rows]
+        return "\n".join(lines)
+
+    with st.sidebar.expander("메모리 사용량 (MiB)", expanded=True):
+        rss = usage["프로세스 RSS"]
+        st.markdown(f"**프로세스 RSS** {rss / MIB:,.0f} MiB" if rss is not None else "**프로세스 RSS** 알 수 없음")
+        st.markdown("**상주 데이터셋** (프로세스 공용)\n\n" + "\n".join(
+            f"- `{d[:12]}` {len(r.catalog):,}권 — {b / MIB:,.1f} MiB" + (" ← 현재" if d == dataset_digest else "")
+            for (d, r), b in zip(datasets, dataset_bytes.values())))
+        st.markdown(f"**모델 캐시** {len(model_cache)}개 항목, {usage['모델 캐시'] / MIB:,.1f} / "
+                    f"{MODEL_CACHE_BUDGET_MB:,} MiB (적중 {model_cache.hits:,} · 학습 {model_cache.misses:,})\n\n"
+                    + "\n".join(f"- `{key[0][:12]}` 세대 {key[1]}, 행 집합 `{key[3][:8]}` — {b / MIB:,.1f} MiB"
+                                for key, b in reversed(model_cache.sizes())))
+        _, _, counts, _ = rec.index.snapshot()
+        st.markdown(mem_table(catalog_rows(catalog) + counts_rows(counts) + engine_rows(view.engine, "현재 뷰 모델")
+                              + sess))